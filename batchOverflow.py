@@ -0,0 +1,195 @@
+"""
+Definition:
+Optional NumPy version of the overflow cascade that steps a whole stack of boards at once.
+A wave is done with array operations: compare against the capacity array to get the overflow
+mask, then add the mask shifted up, down, left and right to reach the neighbours.
+It gives the same boards as hadleOverflow.overflow (each wave takes the sign of its last
+overflowing cell, row by row). NumPy is only needed when these functions are called.
+"""
+try:
+    import numpy as np
+except ImportError:  # the rest of the game runs without NumPy
+    np = None
+
+from boardTopology import get_topology
+from boardState import BoardState
+from hadleOverflow import CascadeLimitError
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('batchOverflow needs NumPy: pip install numpy')
+
+"""
+Definition: Returns the capacity of every cell of a board shape as a (rows, cols) array.
+"""
+def capacity_array(rows, cols):
+    _require_numpy()
+    return np.array(get_topology(rows, cols).capacity, dtype=np.int16).reshape(rows, cols)
+
+"""
+Definition: Converts boards (two-dimensional lists or BoardStates) into a (n, rows, cols) stack.
+
+Parameters:
+boards (list): boards of the same shape.
+
+Return Value:
+numpy array: int16 stack, one board per entry of the first axis.
+"""
+def stack_boards(boards):
+    _require_numpy()
+    return np.array([board.to_board() if isinstance(board, BoardState) else board for board in boards],
+                    dtype=np.int16)
+
+"""
+Definition: Runs one overflow wave on every board of the stack that still overflows.
+
+Parameters:
+boards (numpy array): (n, rows, cols) stack, changed in place.
+capacity (numpy array): (rows, cols) capacities, see capacity_array.
+
+Return Value:
+numpy array: bool (n,) mask of the boards that had a wave.
+"""
+def overflow_wave(boards, capacity):
+    count = boards.shape[0]
+    size = boards.shape[1] * boards.shape[2]
+    gems = np.abs(boards)
+    over = gems >= capacity
+
+    # a board only has a wave while something overflows and both colours are still on it
+    active = (over.any(axis=(1, 2))
+              & (boards > 0).any(axis=(1, 2))
+              & (boards < 0).any(axis=(1, 2)))
+    if not active.any():
+        return active
+    over &= active[:, None, None]
+
+    # the last overflowing cell (row by row) decides the sign of the wave
+    flat_over = over.reshape(count, size)
+    last = size - 1 - np.argmax(flat_over[:, ::-1], axis=1)
+    sign = np.where(boards.reshape(count, size)[np.arange(count), last] > 0, 1, -1).astype(boards.dtype)
+
+    # every overflowing cell gives one gem to each neighbour
+    incoming = np.zeros_like(boards)
+    incoming[:, 1:, :] += over[:, :-1, :]
+    incoming[:, :-1, :] += over[:, 1:, :]
+    incoming[:, :, 1:] += over[:, :, :-1]
+    incoming[:, :, :-1] += over[:, :, 1:]
+
+    emptied = np.where(over, 0, boards)
+    touched = incoming > 0
+    boards[...] = np.where(touched, (np.abs(emptied) + incoming) * sign[:, None, None], emptied)
+    return active
+
+"""
+Definition: Runs the overflow cascade on every board of the stack until all of them are settled.
+Like hadleOverflow.overflow, a board whose cascade comes back to a board it already had raises CascadeLimitError
+(it would never end): once a cascade has run for more waves than the board has cells, each board's gem total is
+followed, and while it stays the same for longer than that the board is compared against a saved copy, saved again
+after 1, 2, 4, ... waves (Brent's cycle check), each board on its own.
+
+Parameters:
+boards (numpy array): (n, rows, cols) stack, changed in place.
+max_waves (int): optional cap on the number of waves, CascadeLimitError is raised when a board needs more.
+
+Return Value:
+numpy array: number of waves each board had, like the return value of hadleOverflow.overflow.
+"""
+def overflow_batch(boards, max_waves=None):
+    _require_numpy()
+    count = boards.shape[0]
+    size = boards.shape[1] * boards.shape[2]
+    capacity = capacity_array(boards.shape[1], boards.shape[2])
+    waves = np.zeros(count, dtype=np.int32)
+    running = np.arange(count)  # boards that may still have a wave to do
+
+    # state of the cycle check of each board, see hadleOverflow._cascade
+    gems = np.zeros(count, dtype=np.int64)
+    steady_waves = np.zeros(count, dtype=np.int32)
+    saved = np.zeros_like(boards)
+    has_saved = np.zeros(count, dtype=bool)
+    saved_power = np.ones(count, dtype=np.int32)
+    saved_age = np.zeros(count, dtype=np.int32)
+
+    while running.size:
+        # only the boards still running are stepped, so long cascades do not drag the whole stack
+        subset = boards[running]
+        active = overflow_wave(subset, capacity)
+        if not active.any():
+            return waves
+        running = running[active]
+        if max_waves is not None and waves[running[0]] >= max_waves:
+            raise CascadeLimitError('overflow cascade still running after %d waves' % max_waves, max_waves)
+        boards[running] = subset[active]
+        waves[running] += 1
+
+        # every running board has had the same number of waves; a cascade shorter than the board
+        # has cells is left unchecked, as the check only starts after that many waves
+        if waves[running[0]] <= size:
+            continue
+        if waves[running[0]] == size + 1:
+            gems[running] = np.abs(boards[running]).sum(axis=(1, 2))
+            continue
+
+        # a board that lost gems cannot be back to an earlier one: its check starts over
+        total = np.abs(boards[running]).sum(axis=(1, 2))
+        lost = total < gems[running]
+        gems[running] = total
+        steady_waves[running] = np.where(lost, 0, steady_waves[running] + 1)
+        reset = running[lost]
+        has_saved[reset] = False
+        saved_power[reset] = 1
+        saved_age[reset] = 0
+
+        checked = running[steady_waves[running] > size]
+        if checked.size:
+            repeats = checked[has_saved[checked] & (boards[checked] == saved[checked]).all(axis=(1, 2))]
+            if repeats.size:
+                raise CascadeLimitError('overflow cascade repeats itself after %d waves' % waves[repeats[0]],
+                                        int(waves[repeats[0]]))
+            saved_age[checked] += 1
+            save = checked[~has_saved[checked] | (saved_age[checked] >= saved_power[checked])]
+            saved[save] = boards[save]
+            has_saved[save] = True
+            saved_power[save] *= 2
+            saved_age[save] = 0
+    return waves
+
+"""
+Definition: Returns which cells each player may play on every board of the stack.
+
+Parameters:
+boards (numpy array): (n, rows, cols) stack.
+players (int or numpy array): 1 or -1, either one for all boards or one per board.
+
+Return Value:
+numpy array: bool (n, rows, cols) mask of the legal cells.
+"""
+def legal_moves(boards, players):
+    _require_numpy()
+    capacity = capacity_array(boards.shape[1], boards.shape[2])
+    players = np.broadcast_to(np.asarray(players, dtype=boards.dtype), boards.shape[:1])[:, None, None]
+    return (boards == 0) | ((boards * players > 0) & (np.abs(boards) < capacity))
+
+"""
+Definition: Plays every legal move of one board at once and runs all the cascades as one batch.
+This is the batch counterpart of GameTree.find_adjacent_neighbors.
+
+Parameters:
+board (list or BoardState): the board to move on.
+player (int): 1 or -1.
+
+Return Value:
+children (numpy array): (n, rows, cols) stack of the boards after each move.
+move_position_list (list of tuples): (row, col) of each move, in the same order, row by row.
+"""
+def batch_children(board, player):
+    _require_numpy()
+    parent = stack_boards([board])
+    legal = legal_moves(parent, player)[0]
+    positions = np.argwhere(legal)
+
+    children = np.repeat(parent, len(positions), axis=0)
+    children[np.arange(len(positions)), positions[:, 0], positions[:, 1]] += player
+    overflow_batch(children)
+    return children, [(int(r), int(c)) for r, c in positions]
@@ -0,0 +1,243 @@
+from boardTopology import get_topology
+from boardState import BoardState
+from hadleOverflow import CascadeLimitError
+
+class _ShapeMasks:
+    """
+    Definition: Bit masks of one board shape, bit i being cell i (index = row * cols + col).
+    """
+    __slots__ = ('cols', 'full', 'corner', 'edge', 'middle', 'has_left', 'has_right')
+
+    def __init__(self, topology):
+        self.cols = topology.cols
+        self.full = (1 << topology.size) - 1
+        self.corner = self.edge = self.middle = 0
+        self.has_left = self.has_right = 0  # cells with a neighbour on that side
+        for i, capacity in enumerate(topology.capacity):
+            bit = 1 << i
+            if capacity == 2:
+                self.corner |= bit
+            elif capacity == 3:
+                self.edge |= bit
+            else:
+                self.middle |= bit
+            col = i % topology.cols
+            if col > 0:
+                self.has_left |= bit
+            if col < topology.cols - 1:
+                self.has_right |= bit
+
+
+_shape_masks = {}
+
+def _get_masks(topology):
+    masks = _shape_masks.get((topology.rows, topology.cols))
+    if masks is None:
+        masks = _ShapeMasks(topology)
+        _shape_masks[(topology.rows, topology.cols)] = masks
+    return masks
+
+"""
+Definition: Yields the cell indexes of the set bits of mask, lowest first (so row by row).
+"""
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitBoard:
+    """
+    Definition:
+    A position stored as a few integers used as bit planes, bit i being cell i (index = row * cols + col).
+    p1 and p2 hold the cells owned by each player; c0, c1 and c2 are the bits of each cell's gem count.
+    A settled cell holds at most 3 gems; during a cascade a cell can briefly reach 7, which still fits.
+    Overflow masks and the spread to neighbours are computed with shifts and masks on whole planes.
+
+    Parameters:
+    rows (int): number of rows of the board.
+    cols (int): number of columns of the board.
+    """
+    __slots__ = ('topology', 'masks', 'p1', 'p2', 'c0', 'c1', 'c2')
+
+    def __init__(self, rows, cols):
+        self.topology = get_topology(rows, cols)
+        self.masks = _get_masks(self.topology)
+        self.p1 = self.p2 = 0
+        self.c0 = self.c1 = self.c2 = 0
+
+    """
+    Definition: Builds a BitBoard from a two-dimensional list or a BoardState.
+
+    Return Value:
+    BitBoard: the same position. ValueError is raised for a cell with more than 7 gems.
+    """
+    @classmethod
+    def from_board(cls, board):
+        if not isinstance(board, BoardState):
+            board = BoardState.from_board(board)
+        bitboard = cls(board.rows, board.cols)
+        for i, value in enumerate(board.cells):
+            if value:
+                bitboard.set(i, value)
+        return bitboard
+
+    def to_board(self):
+        # Back to the two-dimensional list format.
+        return self.to_state().to_board()
+
+    def to_state(self):
+        # Back to a BoardState.
+        return BoardState(self.topology.rows, self.topology.cols, [self.get(i) for i in range(self.topology.size)])
+
+    def clone(self):
+        bitboard = BitBoard.__new__(BitBoard)
+        bitboard.topology = self.topology
+        bitboard.masks = self.masks
+        bitboard.p1, bitboard.p2 = self.p1, self.p2
+        bitboard.c0, bitboard.c1, bitboard.c2 = self.c0, self.c1, self.c2
+        return bitboard
+
+    def get(self, index):
+        # Signed value of a cell, like a BoardState cell.
+        count = ((self.c0 >> index) & 1) | (((self.c1 >> index) & 1) << 1) | (((self.c2 >> index) & 1) << 2)
+        return -count if (self.p2 >> index) & 1 else count
+
+    def set(self, index, value):
+        count = abs(value)
+        if count > 7:
+            raise ValueError('a BitBoard cell holds at most 7 gems, got %d' % value)
+        bit = 1 << index
+        keep = ~bit
+        self.c0 = (self.c0 & keep) | (bit if count & 1 else 0)
+        self.c1 = (self.c1 & keep) | (bit if count & 2 else 0)
+        self.c2 = (self.c2 & keep) | (bit if count & 4 else 0)
+        self.p1 = (self.p1 & keep) | (bit if value > 0 else 0)
+        self.p2 = (self.p2 & keep) | (bit if value < 0 else 0)
+
+    def full_cells(self):
+        # Mask of the cells at or above their capacity (corner 2, edge 3, middle 4).
+        masks = self.masks
+        at_least_two = self.c1 | self.c2
+        at_least_three = self.c2 | (self.c1 & self.c0)
+        return (masks.corner & at_least_two) | (masks.edge & at_least_three) | (masks.middle & self.c2)
+
+    """
+    Definition: Returns the mask of the cells player may play on: empty cells, and the player's own cells with room left.
+
+    Parameters:
+    player (int): 1 or -1.
+    """
+    def legal_moves(self, player):
+        own = self.p1 if player > 0 else self.p2
+        empty = self.masks.full & ~(self.p1 | self.p2)
+        return empty | (own & ~self.full_cells())
+
+    """
+    Definition: Returns 1 or -1 when only that player's gems are left on the board, 0 otherwise (both or none left).
+    """
+    def winner(self):
+        if self.p1 and not self.p2:
+            return 1
+        if self.p2 and not self.p1:
+            return -1
+        return 0
+
+    def _add(self, mask):
+        # adds one gem to every cell of mask (bit-sliced ripple carry over c0, c1, c2).
+        # A cell at 7 would wrap round to 0, callers keep cells at or below 7: in a wave a cell that
+        # does not overflow holds at most 3 gems and gets at most 4, and play checks its own cell.
+        carry = mask
+        self.c0, carry = self.c0 ^ carry, self.c0 & carry
+        self.c1, carry = self.c1 ^ carry, self.c1 & carry
+        self.c2 ^= carry
+
+    """
+    Definition: Adds one of player's gems at index and runs the overflow cascade.
+
+    Parameters:
+    index (int): cell index (row * cols + col), see legal_moves.
+    player (int): 1 or -1.
+    max_waves (int): optional cap on the cascade, see overflow.
+
+    Return Value:
+    int: number of overflow waves. ValueError is raised if the cell already holds 7 gems.
+    """
+    def play(self, index, player, max_waves=None):
+        bit = 1 << index
+        if self.c0 & self.c1 & self.c2 & bit:
+            raise ValueError('a BitBoard cell holds at most 7 gems')
+        self._add(bit)
+        if player > 0:
+            self.p1 |= bit
+        else:
+            self.p2 |= bit
+        return self.overflow(max_waves)
+
+    """
+    Definition: Runs the overflow cascade, the same way hadleOverflow.overflow does.
+
+    Parameters:
+    max_waves (int): optional cap on the number of waves, CascadeLimitError is raised when it is hit
+                     or when the cascade repeats a position.
+
+    Return Value:
+    int: number of overflow waves.
+    """
+    def overflow(self, max_waves=None):
+        masks = self.masks
+        cols = masks.cols
+        full = masks.full
+        waves = 0
+
+        # Brent's cycle check on the whole position (five integers, so cheap to compare)
+        saved = None
+        saved_power = 1
+        saved_age = 0
+
+        while True:
+            over = self.full_cells()
+            if not over or not self.p1 or not self.p2:  # settled, or only one colour left
+                return waves
+            if max_waves is not None and waves >= max_waves:
+                raise CascadeLimitError('overflow cascade still running after %d waves' % waves, waves)
+
+            # the last overflowing cell (highest bit) decides the sign of the wave
+            positive = (self.p1 >> (over.bit_length() - 1)) & 1
+
+            # empty the overflowing cells
+            keep = ~over
+            self.c0 &= keep
+            self.c1 &= keep
+            self.c2 &= keep
+            self.p1 &= keep
+            self.p2 &= keep
+
+            # one gem from each overflowing neighbour: below, above, right and left of the cell
+            from_above = (over << cols) & full
+            from_below = over >> cols
+            from_left = (over << 1) & masks.has_left
+            from_right = (over >> 1) & masks.has_right
+            self._add(from_above)
+            self._add(from_below)
+            self._add(from_left)
+            self._add(from_right)
+
+            touched = from_above | from_below | from_left | from_right
+            if positive:
+                self.p1 |= touched
+                self.p2 &= ~touched
+            else:
+                self.p2 |= touched
+                self.p1 &= ~touched
+            waves += 1
+
+            current = (self.p1, self.p2, self.c0, self.c1, self.c2)
+            if current == saved:
+                raise CascadeLimitError('overflow cascade repeats itself after %d waves' % waves, waves)
+            saved_age += 1
+            if saved is None or saved_age >= saved_power:
+                saved = current
+                saved_power *= 2
+                saved_age = 0
@@ -0,0 +1,155 @@
+from array import array
+from boardTopology import get_topology
+
+class BoardState:
+    """
+    Definition:
+    A board stored as one flat array of signed bytes, row by row (index = row * cols + col).
+    Positive values are player 1's gems, negative values player 2's, 0 is an empty cell.
+    Cloning is a single buffer copy instead of one list per row.
+    p1_count and p2_count are the number of cells each player owns. They are kept up to date by
+    every write that goes through the BoardState (set, item assignment, the overflow engine),
+    so asking whether one colour is left, or who won, does not scan the board.
+    key is the Zobrist key of the cells (see boardTopology.Topology), kept up to date the same way,
+    so a position can be looked up in a table without hashing the whole board.
+
+    Parameters:
+    rows (int): number of rows of the board.
+    cols (int): number of columns of the board.
+    cells (iterable): optional flat cell values, all zero when omitted.
+    """
+    __slots__ = ('rows', 'cols', 'topology', 'cells', 'p1_count', 'p2_count', 'key')
+
+    def __init__(self, rows, cols, cells=None):
+        self.rows = rows
+        self.cols = cols
+        self.topology = get_topology(rows, cols)
+        if cells is None:
+            self.cells = array('b', bytes(rows * cols))
+        else:
+            self.cells = array('b', cells)
+            if len(self.cells) != rows * cols:
+                raise ValueError('expected %d cells, got %d' % (rows * cols, len(self.cells)))
+        self.recount()
+
+    """
+    Definition: Builds a BoardState from a two-dimensional list, or clones one that already is a BoardState.
+
+    Parameters:
+    board (list of lists or BoardState): the board to convert.
+
+    Return Value:
+    BoardState: a new board that shares nothing with the given one.
+    """
+    @classmethod
+    def from_board(cls, board):
+        if isinstance(board, BoardState):
+            return board.clone()
+        return cls(len(board), len(board[0]), [value for row in board for value in row])
+
+    """
+    Definition: Builds a BoardState from the compact form returned by to_bytes.
+    """
+    @classmethod
+    def from_bytes(cls, rows, cols, data):
+        state = cls.__new__(cls)
+        state.rows = rows
+        state.cols = cols
+        state.topology = get_topology(rows, cols)
+        state.cells = array('b')
+        state.cells.frombytes(data)
+        state.recount()
+        return state
+
+    def clone(self):
+        # One buffer copy; the topology is shared.
+        state = BoardState.__new__(BoardState)
+        state.rows = self.rows
+        state.cols = self.cols
+        state.topology = self.topology
+        state.cells = self.cells[:]
+        state.p1_count = self.p1_count
+        state.p2_count = self.p2_count
+        state.key = self.key
+        return state
+
+    def to_board(self):
+        # Back to the two-dimensional list format.
+        cells = self.cells
+        cols = self.cols
+        return [cells[r:r + cols].tolist() for r in range(0, len(cells), cols)]
+
+    def to_bytes(self):
+        # Compact form of the cells, one byte per cell, for hashing or sending to other processes.
+        return self.cells.tobytes()
+
+    def recount(self):
+        # Counts the cells owned by each player and computes the key from scratch;
+        # only needed after writing to cells directly.
+        zobrist = self.topology.zobrist
+        self.p1_count = self.p2_count = 0
+        self.key = 0
+        for index, value in enumerate(self.cells):
+            if value > 0:
+                self.p1_count += 1
+            elif value < 0:
+                self.p2_count += 1
+            self.key ^= zobrist[index][value]
+
+    """
+    Definition: Returns the key of the position with the given player to move, for transposition tables.
+
+    Parameters:
+    player (int): 1 or -1, the player to move.
+
+    Return Value:
+    int: 64-bit Zobrist key.
+    """
+    def position_key(self, player):
+        return self.key if player > 0 else self.key ^ self.topology.side_key
+
+    def get(self, row, col):
+        return self.cells[row * self.cols + col]
+
+    def set(self, row, col, value):
+        self[row * self.cols + col] = value
+
+    def __getitem__(self, index):
+        return self.cells[index]
+
+    def __setitem__(self, index, value):
+        old = self.cells[index]
+        if old > 0:
+            self.p1_count -= 1
+        elif old < 0:
+            self.p2_count -= 1
+        if value > 0:
+            self.p1_count += 1
+        elif value < 0:
+            self.p2_count += 1
+        keys = self.topology.zobrist[index]
+        self.key ^= keys[old] ^ keys[value]
+        self.cells[index] = value
+
+    def one_colour(self):
+        # True when at most one player has gems on the board (same as hadleOverflow.is_same_sign).
+        return self.p1_count == 0 or self.p2_count == 0
+
+    def winner(self):
+        # 1 or -1 when only that player's gems are left, 0 otherwise (both players, or an empty board).
+        if self.p2_count == 0 and self.p1_count > 0:
+            return 1
+        if self.p1_count == 0 and self.p2_count > 0:
+            return -1
+        return 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __eq__(self, other):
+        if isinstance(other, BoardState):
+            return self.cols == other.cols and self.cells == other.cells
+        return NotImplemented
+
+    def __repr__(self):
+        return 'BoardState(%d, %d, %s)' % (self.rows, self.cols, self.cells.tolist())
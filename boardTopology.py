@@ -0,0 +1,94 @@
+import random
+
+"""
+Definition: Board shapes the game can be played on. The dropdown in game.py picks one of these.
+"""
+BOARD_SIZES = [(3, 4), (4, 5), (5, 6)]
+
+class Topology:
+    """
+    Definition:
+    Fixed tables for one board shape, so cascades and searches look up a cell's capacity and
+    neighbours instead of working them out with boundary checks every time.
+    Cells are numbered row by row: index = row * cols + col.
+
+    Parameters:
+    rows (int): number of rows of the board.
+    cols (int): number of columns of the board.
+
+    Attributes:
+    size (int): number of cells.
+    capacity (list): gems each cell holds before it overflows (corner 2, edge 3, middle 4).
+    neighbors (list of tuples): indexes of the up, down, left and right neighbours of each cell.
+    coords (list of tuples): (row, col) of each cell index.
+    zobrist (list of lists): random 64-bit key of each cell value, zobrist[index][value]. Negative
+                             values index from the end of the list, so one list covers both owners;
+                             an empty cell's key is 0. A position's key is the XOR of its cells' keys.
+    side_key (int): random 64-bit key XORed in when player 2 is to move.
+    """
+    __slots__ = ('rows', 'cols', 'size', 'capacity', 'neighbors', 'coords', 'zobrist', 'side_key')
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.capacity = []
+        self.neighbors = []
+        self.coords = []
+
+        for r in range(rows):
+            on_row_edge = r == 0 or r == rows - 1
+            for c in range(cols):
+                on_col_edge = c == 0 or c == cols - 1
+                if on_row_edge and on_col_edge:
+                    self.capacity.append(2)   # corner
+                elif on_row_edge or on_col_edge:
+                    self.capacity.append(3)   # edge
+                else:
+                    self.capacity.append(4)   # middle
+
+                cell_neighbors = []
+                for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < rows and 0 <= nc < cols:
+                        cell_neighbors.append(nr * cols + nc)
+                self.neighbors.append(tuple(cell_neighbors))
+                self.coords.append((r, c))
+
+        # Zobrist keys. The generator is seeded from the shape, so keys are the same on every run
+        # and can be saved to files. Every value a signed byte cell can hold gets a key.
+        generator = random.Random('zobrist %dx%d' % (rows, cols))
+        self.zobrist = []
+        for _ in range(self.size):
+            keys = [generator.getrandbits(64) for _ in range(256)]
+            keys[0] = 0
+            self.zobrist.append(keys)
+        self.side_key = generator.getrandbits(64)
+
+    def index(self, row, col):
+        # Flat index of (row, col).
+        return row * self.cols + col
+
+
+_topologies = {}
+
+"""
+Definition: Returns the topology of a board shape, building it the first time the shape is seen.
+
+Parameters:
+rows (int): number of rows of the board.
+cols (int): number of columns of the board.
+
+Return Value:
+Topology: the shared tables for that shape.
+"""
+def get_topology(rows, cols):
+    topology = _topologies.get((rows, cols))
+    if topology is None:
+        topology = Topology(rows, cols)
+        _topologies[(rows, cols)] = topology
+    return topology
+
+# every selectable board shape is built once, up front
+for _rows, _cols in BOARD_SIZES:
+    get_topology(_rows, _cols)
@@ -0,0 +1,497 @@
+"""
+Definition:
+Endgame table of the 3x4 board: the exact result of every position a 3x4 game can reach, and how
+many plies it takes, solved by retrograde analysis with the overflow rules of hadleOverflow.
+
+A position is a settled board holding both colours plus the player to move. Its cells are read
+as the digits of a mixed-radix number: a cell of capacity c holds -(c-1) to c-1 gems, so it is a
+digit of base 2c-1. The number times two, plus one when player 2 is to move, is the position's
+index in the table. The 3x4 board has 3^4 * 5^6 * 7^2 boards, so the table is 124,031,250 bytes,
+one per index, and a lookup is a single read of the memory-mapped file.
+
+Byte values:
+0            the position cannot be reached from the start of a game
+DRAW (1)     neither player can force a win: every way to win can be answered with a way back
+d + 1        the game ends d plies from here with best play; the player to move wins when d is odd
+             (the winner makes the last move) and loses when d is even
+
+An overflow can destroy gems (a cell holding more than its capacity only passes one gem to each
+neighbour), so a game can come back to a board it had before. Such cycles are the draws.
+
+The table is built in two stages, both split across worker processes:
+1. every position reachable from the start is marked, one ply at a time (breadth first);
+2. passes over the positions not solved yet: pass p solves the positions whose result is p plies
+   away, using only results of earlier passes. A position wins in p plies when a move leads to a
+   position lost in p - 1 plies, and loses in p plies when every move leads to a win for the
+   opponent and the longest of those is p - 1 plies. The positions left when a pass solves
+   nothing are draws. The moves of the unsolved positions are generated by the first pass and
+   kept, so the later passes only read the table.
+The stage and the last finished ply or pass are kept in the file header, so a build that is
+stopped carries on from there when it is started again.
+
+Build it with: python endgameTable.py [--workers N]
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from boardState import BoardState
+from hadleOverflow import make_move, unmake_move, CascadeLimitError
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'endgameTable3x4.bin')
+TABLE_SHAPE = (3, 4)
+TABLE_MAGIC = b'OVEG'
+TABLE_VERSION = 1
+
+DRAW = 1
+
+# outcomes of a move that are not a table index
+WIN = -1     # the move ends the game
+NO_END = -2  # the cascade of the move never settles
+
+# build stages recorded in the header
+MARKING = 0  # step: last ply whose positions are all marked
+SOLVING = 1  # step: last finished pass
+SOLVED = 2
+
+_HEADER = struct.Struct('<4sBBBBI')  # magic, version, rows, cols, stage, step
+_CHUNK = 20000  # positions handed to a worker at a time
+
+
+class _Numbering:
+    """
+    Definition: Converts between the cells of a board shape plus the player to move, and table indexes.
+    """
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.topology = BoardState(rows, cols).topology
+        self.capacity = self.topology.capacity
+        self.radix = [2 * capacity - 1 for capacity in self.capacity]
+        self.weights = []
+        weight = 1
+        for radix in self.radix:
+            self.weights.append(weight)
+            weight *= radix
+        self.boards = weight
+        self.size = 2 * weight
+        # codes[i][value] is the share of cell i holding value in the board number; negative
+        # values index from the end of the list, the same way as the Zobrist keys
+        self.codes = []
+        for capacity, weight in zip(self.capacity, self.weights):
+            self.codes.append([(value + capacity - 1) * weight for value in
+                               list(range(capacity)) + list(range(1 - capacity, 0))])
+
+    def encode(self, cells, player):
+        # the table index of a settled board; cells holding a full cell have no index
+        codes = self.codes
+        number = 0
+        for i, value in enumerate(cells):
+            number += codes[i][value]
+        return 2 * number + (player < 0)
+
+    def decode(self, index):
+        number, side = divmod(index, 2)
+        cells = []
+        for radix, capacity in zip(self.radix, self.capacity):
+            number, digit = divmod(number, radix)
+            cells.append(digit - capacity + 1)
+        return cells, -1 if side else 1
+
+    def settled(self, cells):
+        return all(abs(value) < capacity for value, capacity in zip(cells, self.capacity))
+
+
+_numberings = {}
+
+def _get_numbering(rows, cols):
+    numbering = _numberings.get((rows, cols))
+    if numbering is None:
+        numbering = _numberings[(rows, cols)] = _Numbering(rows, cols)
+    return numbering
+
+
+"""
+Definition: Returns the number of bytes of the table of a board shape, header included.
+"""
+def table_size(rows, cols):
+    return _HEADER.size + _get_numbering(rows, cols).size
+
+
+def _moves(numbering, index):
+    # Yields (cell index, outcome) for every move of the position at index. outcome is the index
+    # of the position the move leads to, WIN when the move leaves only the mover's colour on the
+    # board (a cascade turns every cell it reaches to the mover, so only the mover can be left),
+    # or NO_END when its cascade never settles.
+    cells, player = numbering.decode(index)
+    capacity = numbering.capacity
+    weights = numbering.weights
+    board = None
+    other_side = index - (player < 0) + (player > 0)  # same board, other player to move
+    for i, value in enumerate(cells):
+        if value * player < 0:
+            continue
+        if abs(value + player) < capacity[i]:
+            # no overflow, and both colours stay on the board
+            yield i, other_side + 2 * player * weights[i]
+            continue
+        if board is None:
+            board = BoardState(numbering.rows, numbering.cols, cells)
+        try:
+            undo = make_move(board, i, player)
+        except CascadeLimitError:
+            board = None  # left part way through the cascade
+            yield i, NO_END
+            continue
+        if board.one_colour():
+            outcome = WIN
+        else:
+            outcome = numbering.encode(board.cells, -player)
+        unmake_move(board, undo)
+        yield i, outcome
+
+_views = {}
+
+def _view(path):
+    # read-only map of a table file, opened once per process
+    view = _views.get(path)
+    if view is None:
+        with open(path, 'rb') as file:
+            view = _views[path] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return view
+
+
+def _mark_chunk(path, rows, cols, indexes):
+    # the positions reached in one ply from the given ones and not marked yet
+    numbering = _get_numbering(rows, cols)
+    view = _view(path)
+    offset = _HEADER.size
+    found = set()
+    for index in indexes:
+        for _, outcome in _moves(numbering, index):
+            if outcome >= 0 and not view[offset + outcome]:
+                found.add(outcome)
+    return array('I', found)
+
+
+def _solve_chunk(path, rows, cols, step, chunk):
+    # Runs pass step over a chunk of unsolved positions. chunk is (indexes, offsets, outcomes): the
+    # outcomes of the moves of position k are outcomes[offsets[k]:offsets[k + 1]]. The moves are
+    # only generated the first time a chunk is seen (offsets None), then kept with the chunk, so
+    # later passes only read bytes of the table.
+    # Returns the (index, byte) of every position solved, and the chunk of those left.
+    numbering = _get_numbering(rows, cols)
+    view = _view(path)
+    offset = _HEADER.size
+    indexes, offsets, outcomes = chunk
+    if offsets is None:
+        offsets = array('I', [0])
+        outcomes = array('i')
+        for index in indexes:
+            outcomes.extend(outcome for _, outcome in _moves(numbering, index))
+            offsets.append(len(outcomes))
+
+    solved = []
+    left, left_offsets, left_outcomes = array('I'), array('I', [0]), array('i')
+    for k, index in enumerate(indexes):
+        moves = outcomes[offsets[k]:offsets[k + 1]]
+        shortest_win = None
+        longest_loss = 0
+        open_moves = False
+        for outcome in moves:
+            if outcome == WIN:
+                shortest_win = 1
+                break
+            if outcome == NO_END:
+                open_moves = True
+                continue
+            distance = view[offset + outcome] - 1
+            if distance <= 0 or distance >= step:
+                open_moves = True  # a draw so far, or solved by this pass
+            elif distance % 2 == 0:
+                # the opponent loses there
+                if shortest_win is None or distance + 1 < shortest_win:
+                    shortest_win = distance + 1
+            else:
+                longest_loss = max(longest_loss, distance + 1)
+        if shortest_win is not None:
+            solved.append((index, shortest_win + 1))
+        elif not open_moves:
+            solved.append((index, longest_loss + 1))
+        else:
+            left.append(index)
+            left_outcomes.extend(moves)
+            left_offsets.append(len(left_outcomes))
+    return solved, (left, left_offsets, left_outcomes)
+
+
+def _split(indexes):
+    # the positions handed to the workers, _CHUNK at a time
+    return [indexes[i:i + _CHUNK] for i in range(0, len(indexes), _CHUNK)]
+
+
+def _scan(view, value):
+    # the table indexes of every byte equal to value
+    found = array('I')
+    needle = bytes([value])
+    position = view.find(needle, _HEADER.size)
+    while position >= 0:
+        found.append(position - _HEADER.size)
+        position = view.find(needle, position + 1)
+    return found
+
+
+"""
+Definition:
+Builds the endgame table of a board shape, or carries on with a build that was stopped.
+
+Parameters:
+rows (int), cols (int): the board shape; games start with player 1 in the top left corner.
+path (str): the table file.
+workers (int): the number of processes the work is split across; 1 works in this process.
+progress (function): optional, called with (stage, step, positions) after every ply or pass.
+
+Return Value:
+dict: 'reachable' positions, 'wins', 'losses' and 'draws' among them, the table 'bytes' and the
+'result' (distance plus one, or DRAW) of the start position.
+"""
+def solve(rows, cols, path=TABLE_FILE, workers=1, progress=None):
+    numbering = _get_numbering(rows, cols)
+    if not os.path.exists(path) or os.path.getsize(path) != table_size(rows, cols):
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, rows, cols, MARKING, 0))
+            file.truncate(table_size(rows, cols))
+        start = [0] * (rows * cols)
+        start[0], start[-1] = 1, -1
+        with open(path, 'r+b') as file:
+            file.seek(_HEADER.size + numbering.encode(start, 1))
+            file.write(bytes([1]))  # ply 0, marked with ply + 1
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(workers)
+
+    with open(path, 'r+b') as file:
+        view = mmap.mmap(file.fileno(), 0)
+    try:
+        magic, version, table_rows, table_cols, stage, step = _HEADER.unpack_from(view, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or (table_rows, table_cols) != (rows, cols):
+            raise ValueError('%s is not a %dx%d endgame table of version %d' % (path, rows, cols, TABLE_VERSION))
+
+        def run(function, chunks, *arguments):
+            if executor is None:
+                return [function(path, rows, cols, *arguments, chunk) for chunk in chunks]
+            return executor.map(function, *zip(*[(path, rows, cols) + arguments + (chunk,) for chunk in chunks]))
+
+        def finish(stage, step):
+            view.flush()
+            _HEADER.pack_into(view, 0, TABLE_MAGIC, TABLE_VERSION, rows, cols, stage, step)
+            view.flush()
+
+        if stage == MARKING:
+            # while marking, a reachable position's byte is its ply + 1; marks of the ply that was
+            # being marked when the build stopped are wiped and that ply is marked again
+            wipe = bytes(range(256)).replace(bytes([step + 2]), b'\0')
+            view[_HEADER.size:] = view[_HEADER.size:].translate(wipe)
+            frontier = _scan(view, step + 1)
+            while frontier:
+                if step + 2 > 255:
+                    raise ValueError('games reach deeper than %d plies' % step)
+                found = array('I')
+                for children in run(_mark_chunk, _split(frontier)):
+                    for child in children:
+                        if not view[_HEADER.size + child]:
+                            view[_HEADER.size + child] = step + 2
+                            found.append(child)
+                step += 1
+                finish(MARKING, step)
+                frontier = found
+                if progress is not None:
+                    progress(MARKING, step, len(frontier))
+            # every reachable position becomes unsolved (DRAW until a pass solves it)
+            reached = bytes([0]) + bytes([DRAW]) * 255
+            view[_HEADER.size:] = view[_HEADER.size:].translate(reached)
+            stage, step = SOLVING, 0
+            finish(stage, step)
+
+        if stage == SOLVING:
+            chunks = [(indexes, None, None) for indexes in _split(_scan(view, DRAW))]
+            while True:
+                step += 1
+                solved = 0
+                results = list(run(_solve_chunk, chunks, step))
+                chunks = []
+                for updates, chunk in results:
+                    for index, value in updates:
+                        view[_HEADER.size + index] = value
+                    solved += len(updates)
+                    if chunk[0]:
+                        chunks.append(chunk)
+                del results
+                if not solved or step == 254:
+                    finish(SOLVED, step)
+                    break
+                finish(SOLVING, step)
+                if progress is not None:
+                    progress(SOLVING, step, sum(len(chunk[0]) for chunk in chunks))
+
+        data = view[_HEADER.size:]
+        counts = [data.count(bytes([value])) for value in range(256)]
+        start = [0] * (rows * cols)
+        start[0], start[-1] = 1, -1
+        return {'reachable': sum(counts[1:]),
+                'wins': sum(counts[2::2]),
+                'losses': sum(counts[3::2]),
+                'draws': counts[DRAW],
+                'bytes': len(view),
+                'result': view[_HEADER.size + numbering.encode(start, 1)]}
+    finally:
+        view.close()
+        if path in _views:
+            _views.pop(path).close()
+        if executor is not None:
+            executor.shutdown()
+
+
+class EndgameTable:
+    """
+    Definition:
+    Read-only view of a finished table file. The file is memory-mapped and stays open until close().
+
+    Parameters:
+    path (str): the table file, TABLE_FILE when omitted.
+    """
+    def __init__(self, path=TABLE_FILE):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, stage, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or stage != SOLVED \
+                or len(self._map) != table_size(rows, cols):
+            self._map.close()
+            raise ValueError('%s is not a finished endgame table of version %d' % (path, TABLE_VERSION))
+        self.rows = rows
+        self.cols = cols
+        self._numbering = _get_numbering(rows, cols)
+
+    def _index(self, board, player):
+        # table index of a board, or None when the table does not cover it
+        if isinstance(board, BoardState):
+            if (board.rows, board.cols) != (self.rows, self.cols):
+                return None
+            cells = board.cells
+        else:
+            if (len(board), len(board[0])) != (self.rows, self.cols):
+                return None
+            cells = [value for row in board for value in row]
+        if not self._numbering.settled(cells):
+            return None
+        return self._numbering.encode(cells, player)
+
+    """
+    Definition:
+    Looks up the exact result of a position.
+
+    Parameters:
+    board (list of lists or BoardState): the position.
+    player (int): the player to move, 1 or -1.
+
+    Return Value:
+    tuple: (result, distance): result is 1 when the player to move wins, -1 when they lose and 0
+    for a draw; distance is the number of plies to the end of the game with best play (0 for a
+    draw). None when the table does not cover the position.
+    """
+    def lookup(self, board, player):
+        index = self._index(board, player)
+        if index is None:
+            return None
+        value = self._map[_HEADER.size + index]
+        if value == 0:
+            return None
+        if value == DRAW:
+            return (0, 0)
+        distance = value - 1
+        return (1 if distance % 2 else -1, distance)
+
+    """
+    Definition:
+    Picks the best move of a position: the quickest win, else a draw, else the slowest loss.
+
+    Parameters:
+    board (list of lists or BoardState): the position.
+    player (int): the player to move, 1 or -1.
+
+    Return Value:
+    tuple: the (row, col) of the move, or None when the table does not cover the position.
+    """
+    def best_move(self, board, player):
+        index = self._index(board, player)
+        if index is None or not self._map[_HEADER.size + index]:
+            return None
+        best, best_score = None, None
+        for cell, outcome in _moves(self._numbering, index):
+            if outcome == WIN:
+                return self._numbering.topology.coords[cell]
+            value = DRAW if outcome == NO_END else self._map[_HEADER.size + outcome]
+            if value == DRAW:
+                score = 0
+            elif (value - 1) % 2 == 0:
+                score = 1000 - value   # the opponent loses there: the sooner the better
+            else:
+                score = value - 1000   # the opponent wins there: the later the better
+            if best_score is None or score > best_score:
+                best, best_score = cell, score
+        return self._numbering.topology.coords[best]
+
+    def close(self):
+        self._map.close()
+
+
+_table = None
+
+"""
+Definition:
+Opens the default table file once and shares it between callers.
+
+Return Value:
+EndgameTable: the table, or None when there is no finished table file.
+"""
+def open_table():
+    global _table
+    if _table is None:
+        try:
+            _table = EndgameTable()
+        except (OSError, ValueError):
+            return None
+    return _table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve the 3x4 board and write its endgame table.')
+    parser.add_argument('--output', default=TABLE_FILE, help='table file to write or carry on with')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='processes to split the work across')
+    args = parser.parse_args()
+
+    def progress(stage, step, positions):
+        if stage == MARKING:
+            print('ply %d: %d new positions' % (step, positions), flush=True)
+        else:
+            print('pass %d: %d positions left' % (step, positions), flush=True)
+
+    rows, cols = TABLE_SHAPE
+    start = time.perf_counter()
+    stats = solve(rows, cols, args.output, args.workers, progress)
+    print('%d reachable positions: %d wins, %d losses, %d draws for the player to move'
+          % (stats['reachable'], stats['wins'], stats['losses'], stats['draws']))
+    result = stats['result']
+    if result == DRAW:
+        print('the start position is a draw')
+    else:
+        print('player %d wins from the start in %d plies' % (1 if (result - 1) % 2 else 2, result - 1))
+    print('wrote %s (%d bytes) in %.1f s' % (args.output, stats['bytes'], time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
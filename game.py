@@ -2,10 +2,14 @@ import pygame
 import sys
 import math
 
-from hadleOverflow import overflow
+from hadleOverflow import overflow, apply_wave
+from boardTopology import BOARD_SIZES
+from boardState import BoardState
 from dataInput import Queue
 from player1 import PlayerOne
 from player2 import PlayerTwo
+from playerMonteCarlo import PlayerMonteCarlo
+from moveWorker import MoveWorker
 
 class Dropdown:
     def __init__(self, x, y, width, height, options):
@@ -56,19 +60,19 @@ class Board:
         """
         self.width = width
         self.height = height
-        self.board = [[0 for _ in range(width)] for _ in range(height)]
+        self.board = BoardState(height, width)  # flat board, index = row * width + col
         self.p1_sprites = p1_sprites
         self.p2_sprites = p2_sprites
-        self.board[0][0] = 1
-        self.board[self.height - 1][self.width - 1] = -1
+        self.board.set(0, 0, 1)
+        self.board.set(self.height - 1, self.width - 1, -1)
         self.turn = 0
 
     def get_board(self):
         """
         Returns a copy of the current board state.
-        Return: A copy of the board state.
+        Return: A copy of the board state (BoardState, a single buffer copy).
         """
-        return [row.copy() for row in self.board]
+        return self.board.clone()
 
     def valid_move(self, row, col, player):
         """
@@ -76,7 +80,7 @@ class Board:
         Return: True if the move is valid, False otherwise.
         """
         if 0 <= row < self.height and 0 <= col < self.width and (
-                self.board[row][col] == 0 or self.board[row][col] / abs(self.board[row][col]) == player):
+                self.board.get(row, col) == 0 or self.board.get(row, col) / abs(self.board.get(row, col)) == player):
             return True
         return False
 
@@ -86,7 +90,7 @@ class Board:
         Return: True if the piece was added successfully, False otherwise.
         """
         if self.valid_move(row, col, player):
-            self.board[row][col] += player
+            self.board.set(row, col, self.board.get(row, col) + player)
             self.turn += 1
             return True
         return False
@@ -97,39 +101,37 @@ class Board:
         Return: 1 if player 1 wins, -1 if player 2 wins, 0 if no winner yet.
         """
         if self.turn > 0:
-            num_p1 = num_p2 = 0
-            for i in range(self.height):
-                for j in range(self.width):
-                    if self.board[i][j] > 0:
-                        if num_p2 > 0:
-                            return 0
-                        num_p1 += 1
-                    elif self.board[i][j] < 0:
-                        if num_p1 > 0:
-                            return 0
-                        num_p2 += 1
+            # the board keeps count of the cells each player owns, so no scan is needed
+            num_p1 = self.board.p1_count
+            num_p2 = self.board.p2_count
+            if num_p1 > 0 and num_p2 > 0:
+                return 0
             if num_p1 == 0:
                 return -1
             if num_p2 == 0:
                 return 1
         return 0
 
-    def do_overflow(self, q):
+    def do_overflow(self, q, start=None):
         """
-        Handles overflow and reverts to a previous state if necessary.
+        Runs the overflow on a copy of the board and leaves the board as it is, so the waves can be animated.
+        start is the (row, col) just played, so the cascade only checks the cells it touches.
+        Impact: Each wave is added to q as the cells it changed; apply_wave replays them one by one.
         Return: Number of handled overflow steps.
         """
-        oldboard = [row.copy() for row in self.board]
-        numsteps = overflow(self.board, q)
-        if numsteps != 0:
-            self.set(oldboard)
-        return numsteps
+        return overflow(self.get_board(), q, start)
+
+    def apply_wave(self, wave):
+        """
+        Steps the board forward by one overflow wave recorded by do_overflow.
+        """
+        apply_wave(self.board, wave)
 
     def set(self, newboard):
         """
-        Sets the board to a new state.
+        Sets the board to a new state (a two-dimensional list or a BoardState).
         """
-        self.board = [row.copy() for row in newboard]
+        self.board = BoardState.from_board(newboard)
 
     def draw(self, window, frame):
         """
@@ -141,23 +143,24 @@ class Board:
                 pygame.draw.rect(window, BLACK, rect, 1)
         for row in range(self.height):
             for col in range(self.width):
-                if self.board[row][col] != 0:
+                value = self.board.get(row, col)
+                if value != 0:
                     rpos = row * CELL_SIZE + Y_OFFSET
                     cpos = col * CELL_SIZE + X_OFFSET
-                    sprite = self.p1_sprites if self.board[row][col] > 0 else self.p2_sprites
-                    if abs(self.board[row][col]) == 1:
+                    sprite = self.p1_sprites if value > 0 else self.p2_sprites
+                    if abs(value) == 1:
                         # Draw a single piece.
                         cpos += CELL_SIZE // 2 - 16
                         rpos += CELL_SIZE // 2 - 16
                         window.blit(sprite[math.floor(frame)], (cpos, rpos))
-                    elif abs(self.board[row][col]) == 2:
+                    elif abs(value) == 2:
                         # Draw two pieces.
                         cpos += CELL_SIZE // 2 - 32
                         rpos += CELL_SIZE // 2 - 16
                         window.blit(sprite[math.floor(frame)], (cpos, rpos))
                         cpos += 32
                         window.blit(sprite[math.floor(frame)], (cpos, rpos))
-                    elif abs(self.board[row][col]) == 3:
+                    elif abs(value) == 3:
                         # Draw three pieces.
                         cpos += CELL_SIZE // 2 - 16
                         rpos += 8
@@ -167,7 +170,7 @@ class Board:
                         window.blit(sprite[math.floor(frame)], (cpos, rpos))
                         cpos += 32
                         window.blit(sprite[math.floor(frame)], (cpos, rpos))
-                    elif abs(self.board[row][col]) == 4:
+                    elif abs(value) == 4:
                         # Draw four pieces.
                         cpos += CELL_SIZE // 2 - 32
                         rpos += 8
@@ -194,7 +197,7 @@ def get_grid_size(choice):
     Impact: Dynamically changes the board size by recreating the Board object based on the selected size.
     Return: A tuple representing the board size (rows, columns).
     """
-    sizes = [(3, 4), (4, 5), (5, 6)]  # List of board sizes based on selection
+    sizes = BOARD_SIZES  # List of board sizes based on selection, shared with the topology tables
     # sizes[0] = 3*4 board, sizes[1] = 4*5 board.... saved to matched later
     # should be continuously verified size matching : If not => result : forcely initialized every player turn
     return sizes[choice]
@@ -207,8 +210,8 @@ font = pygame.font.Font(None, 36)
 bigfont = pygame.font.Font(None, 108)
 
 # Initialize dropdown menus
-player1_dropdown = Dropdown(900, 50, 200, 50, ['Human', 'AI'])
-player2_dropdown = Dropdown(900, 110, 200, 50, ['Human', 'AI'])
+player1_dropdown = Dropdown(900, 50, 200, 50, ['Human', 'AI', 'MCTS'])
+player2_dropdown = Dropdown(900, 110, 200, 50, ['Human', 'AI', 'MCTS'])
 
 """
 Purpose: Provide UI for defining board size drop-down menu and match grid.size selection
@@ -240,6 +243,8 @@ overflowing = False
 numsteps = 0
 has_winner = False
 bots = [PlayerOne(), PlayerTwo()]
+mcts_bots = [PlayerMonteCarlo(1), PlayerMonteCarlo(-1)]  # picked with 'MCTS' in the player dropdowns
+worker = None  # the bot move being searched in the background, see MoveWorker
 grid_col = -1
 grid_row = -1
 choice = [None, None]
@@ -271,6 +276,14 @@ while running:
                 # Creates a new board with the selected size
                 # New board matching with additional temp grid if it doesn't matched already
                 board = Board(GRID_SIZE[1], GRID_SIZE[0], p1_sprites, p2_sprites)
+                # waves still queued belong to the old board, and so do the move being searched and the positions the bots are pondering
+                overflow_boards = Queue()
+                overflowing = False
+                if worker is not None:
+                    worker.cancel()
+                    worker = None
+                for bot in bots:
+                    bot.stop_pondering()
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.pos
@@ -289,8 +302,7 @@ while running:
             status[0] = "Overflowing"
             if not overflow_boards.is_empty():
                 if numsteps == FULL_DELAY:
-                    next_board = overflow_boards.dequeue()
-                    board.set(next_board)
+                    board.apply_wave(overflow_boards.dequeue())
                     numsteps = 0
                 else:
                     numsteps += 1
@@ -300,21 +312,38 @@ while running:
         else:
             status[0] = f"Player {current_player + 1}'s turn"
             make_move = False
-            if choice[current_player] == 1:  # AI player
-                grid_row, grid_col = bots[current_player].get_play(board.get_board())
-                status[1] = f"Bot chose row {grid_row}, col {grid_col}"
-                if not board.valid_move(grid_row, grid_col, player_id[current_player]):
-                    has_winner = True
-                    winner = ((current_player + 1) % 2) + 1
+            if choice[current_player] in (1, 2):  # AI player: minimax (1) or Monte Carlo tree search (2)
+                bot = bots[current_player] if choice[current_player] == 1 else mcts_bots[current_player]
+                if worker is not None and worker.bot is not bot:
+                    worker.cancel()  # the player's dropdown was changed while its bot was searching
+                    worker = None
+                if worker is None:
+                    if choice[current_player] == 1:
+                        # ponder only against a human: against a bot it would slow down the other bot's search
+                        bot.ponder = choice[(current_player + 1) % 2] == 0
+                    # search in the background so the window keeps drawing and answering events
+                    worker = MoveWorker(bot, board.get_board())
+                if not worker.done():
+                    status[1] = f"{bot.get_name()} is thinking: {worker.progress()}"
                 else:
-                    make_move = True
+                    grid_row, grid_col = worker.result()
+                    worker = None
+                    status[1] = f"Bot chose row {grid_row}, col {grid_col}"
+                    if not board.valid_move(grid_row, grid_col, player_id[current_player]):
+                        has_winner = True
+                        winner = ((current_player + 1) % 2) + 1
+                    else:
+                        make_move = True
             else:  # Human player
+                if worker is not None:
+                    worker.cancel()  # the player was switched to human while its bot was searching
+                    worker = None
                 if board.valid_move(grid_row, grid_col, player_id[current_player]):
                     make_move = True
 
             if make_move:
                 board.add_piece(grid_row, grid_col, player_id[current_player])
-                numsteps = board.do_overflow(overflow_boards)
+                numsteps = board.do_overflow(overflow_boards, (grid_row, grid_col))
                 if numsteps != 0:
                     overflowing = True
                     numsteps = 0
@@ -353,5 +382,7 @@ while running:
     pygame.display.update()
     pygame.time.delay(100)
 
+if worker is not None:
+    worker.cancel()
 pygame.quit()
 sys.exit()
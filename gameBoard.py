@@ -1,16 +1,25 @@
-from hadleOverflow import overflow
-from dataInput import Queue
+from hadleOverflow import overflow, make_move, unmake_move, CascadeLimitError
+from boardState import BoardState
+from transpositionTable import TranspositionTable, EXACT, LOWER, UPPER
+from concurrent.futures import wait, FIRST_COMPLETED
+import math
+import os
+import time
 
 """
 Definition: A function that clones a given board and returns a new board.
 
 Parameters:
-board: The board to clone. A two-dimensional list where each row is represented as a list.
+board: The board to clone. A two-dimensional list where each row is represented as a list, or a BoardState.
 
 Returns:
-list of lists: A deep clone of the given board. A new two-dimensional list with the same structure as the original board.
+list of lists or BoardState: A deep clone of the given board, in the same format as the original board.
 """
 def copy_board(board):
+    # A BoardState is cloned with a single buffer copy.
+    if isinstance(board, BoardState):
+        return board.clone()
+
     # Create an empty list to store the cloned boards.
     current_board = []
     
@@ -26,9 +35,11 @@ def copy_board(board):
 
 """
 Definition: A function that evaluates a given board and returns the current player's score.
+Each player scores the share of all gems that are theirs, plus 100 for every 3 of their cells in a row down a column
+(a run of 6 counts twice). The board is read in one pass, column by column, adding up the gems and the runs together.
 
 Parameters:
-board : A two-dimensional list representing the board state. The value of each cell represents a player's score.
+board : A two-dimensional list or a BoardState representing the board state. The value of each cell represents a player's score.
 current_player (int): An integer representing the current player. It can be 1 or -1.
 
 Return Value:
@@ -39,43 +50,77 @@ def evaluate_board(board, current_player) -> float:
     player1_score = 0  # player1 score
     player2_score = 0  # player2 score
     player1_vertical_bonus = 0  # Vertical bonus points for player 1
-    player2_vertical_bonus = 0  # Vertical bonus points for player 1
-
-    num_rows = len(board)  # row num of board 
-    num_cols = len(board[0])  # col num of board
-
-    # Calculate player score based on the each cell
-    for row in board:  
-        for cell in row:  
-            if cell > 0: # if cell value is positive, add player1 score
-                player1_score += cell  
-            elif cell < 0: # if cell value is negative, add player2 score
-                player2_score -= cell  
-
-    # Check three consecutive vertical cells and calculate bonus points
+    player2_vertical_bonus = 0  # Vertical bonus points for player 2
+
+    # Flat cells, row by row (index = row * num_cols + col)
+    if isinstance(board, BoardState):
+        cells = board.cells
+        num_cols = board.cols  # col num of board
+    else:
+        cells = [cell for row in board for cell in row]
+        num_cols = len(board[0])  # col num of board
+
+    # Each column top to bottom: add the cell to its player's score and count three consecutive cells for the bonus
+    # (the same loop as column_score, written out here because it runs at every leaf of the search)
     for col in range(num_cols):  
         consecutive_player1 = 0  # Player 1 consecutive cell counter
         consecutive_player2 = 0  # Player 2 consecutive cell counter
-        for row in range(num_rows): 
-            cell = board[row][col]  
+        for cell in cells[col::num_cols]:
             if cell > 0:
-                consecutive_player1 += 1 # Player 1 cell consecutive counter increases
-                consecutive_player2 = 0  # Player 2 cell consecutive counter reset
+                player1_score += cell
+                consecutive_player2 = 0
+                consecutive_player1 += 1
+                if consecutive_player1 == 3:
+                    player1_vertical_bonus += 100  # Add bonus 100 to player 1
+                    consecutive_player1 = 0  # Counter reset after bonus
             elif cell < 0:
-                consecutive_player2 += 1 # Player 2 cell consecutive counter increases
-                consecutive_player1 = 0  # Player 2 cell consecutive counter reset
+                player2_score -= cell
+                consecutive_player1 = 0
+                consecutive_player2 += 1
+                if consecutive_player2 == 3:
+                    player2_vertical_bonus += 100  # Add bonus 100 to player 2
+                    consecutive_player2 = 0  # Counter reset after bonus
             else:                        # Reset counter if cell is empty      
                 consecutive_player1 = 0  
                 consecutive_player2 = 0  
 
-            # Bonus points added when there are 3 or more consecutive cells
-            if consecutive_player1 >= 3:
-                player1_vertical_bonus += 100  # Add bonus 100 to player 1
-                consecutive_player1 = 0  # Counter reset after bonus
-            if consecutive_player2 >= 3:
-                player2_vertical_bonus += 100  # Add bonus 100 to player 2
-                consecutive_player2 = 0  # Counter reset after bonus
+    return weighted_score(player1_score, player2_score, player1_vertical_bonus, player2_vertical_bonus, current_player)
+
+"""
+Definition: The score of one column, as evaluate_board counts it.
+
+Parameters:
+column (iterable): The cells of the column, top to bottom.
+
+Return Value:
+tuple: (player 1 gems, player 2 gems, player 1 bonus, player 2 bonus).
+"""
+def column_score(column):
+    player1_score = player2_score = player1_bonus = player2_bonus = 0
+    consecutive_player1 = consecutive_player2 = 0
+    for cell in column:
+        if cell > 0:
+            player1_score += cell
+            consecutive_player2 = 0
+            consecutive_player1 += 1
+            if consecutive_player1 == 3:
+                player1_bonus += 100
+                consecutive_player1 = 0
+        elif cell < 0:
+            player2_score -= cell
+            consecutive_player1 = 0
+            consecutive_player2 += 1
+            if consecutive_player2 == 3:
+                player2_bonus += 100
+                consecutive_player2 = 0
+        else:
+            consecutive_player1 = consecutive_player2 = 0
+    return player1_score, player2_score, player1_bonus, player2_bonus
 
+"""
+Definition: Turns the gem counts and bonuses of a board into the current player's score (see evaluate_board).
+"""
+def weighted_score(player1_score, player2_score, player1_vertical_bonus, player2_vertical_bonus, current_player):
     # Calculate the total value of non-empty cells
     total_value = player1_score + player2_score  
 
@@ -87,245 +132,630 @@ def evaluate_board(board, current_player) -> float:
     # Returns the current player's score
     return player1_score if current_player == 1 else player2_score  
 
+class BoardEvaluation:
+    """
+    Definition:
+    evaluate_board kept up to date while a board is played on, instead of read again at every position.
+    It keeps the column_score of each column and their sums. When a move changes some cells, only the
+    columns holding them are scored again; taking the move back puts the old scores back. The score
+    is always the same as evaluate_board(board, player).
+
+    Parameters:
+    board (BoardState): The board to follow. Every change to it must be passed to play, and taken back with undo.
+    """
+    def __init__(self, board):
+        self.board = board
+        cells = board.cells
+        num_cols = board.cols
+        self.columns = [column_score(cells[col::num_cols]) for col in range(num_cols)]
+        self.totals = tuple(map(sum, zip(*self.columns)))
+        self.saved = []  # for each play not taken back yet: the totals and the (col, score) it replaced
+
+    """
+    Definition: Scores again the columns of the cells a move changed.
+
+    Parameters:
+    indexes (iterable): The cell indexes the move and its overflow wrote to, or None when any cell may have changed.
+    """
+    def play(self, indexes = None):
+        cells = self.board.cells
+        num_cols = self.board.cols
+        columns = self.columns
+        cols = range(num_cols) if indexes is None else {index % num_cols for index in indexes}
+        replaced = []
+        player1_score, player2_score, player1_bonus, player2_bonus = self.totals
+        for col in cols:
+            old = columns[col]
+            new = column_score(cells[col::num_cols])
+            if new != old:
+                replaced.append((col, old))
+                columns[col] = new
+                player1_score += new[0] - old[0]
+                player2_score += new[1] - old[1]
+                player1_bonus += new[2] - old[2]
+                player2_bonus += new[3] - old[3]
+        self.saved.append((self.totals, replaced))
+        self.totals = (player1_score, player2_score, player1_bonus, player2_bonus)
+
+    """
+    Definition: Takes back the last play, once the board is back where it was before it.
+    """
+    def undo(self):
+        self.totals, replaced = self.saved.pop()
+        columns = self.columns
+        for col, old in replaced:
+            columns[col] = old
+
+    """
+    Definition: Returns evaluate_board(board, current_player) for the board as it is now.
+    """
+    def score(self, current_player):
+        return weighted_score(*self.totals, current_player)
+
+"""
+Definition: Works out the masks of the cells each player may play on (bit i being cell i, index = row * cols + col).
+A cell is legal for a player when it is empty, or holds that player's gems and has room left.
+After a move only the cells it changed need to be looked at: the masks from before the move are updated for them.
+
+Parameters:
+board (BoardState): The board after the move.
+masks (tuple): The (player 1, player 2) masks from before the move, or None to work them out for every cell.
+changes (list): The (index, new value) of the cells the move and its overflow changed, as in GameTree.Node.redo.
+
+Return Value:
+tuple: The (player 1, player 2) masks of the board.
+"""
+def legal_masks(board, masks = None, changes = None):
+    capacity = board.topology.capacity
+    if masks is None or type(changes) is not list:
+        p1 = p2 = 0
+        changes = enumerate(board.cells)
+    else:
+        p1, p2 = masks
+    for index, value in changes:
+        bit = 1 << index
+        if value == 0:
+            p1 |= bit
+            p2 |= bit
+        elif value > 0:
+            p2 &= ~bit
+            if value < capacity[index]:
+                p1 |= bit
+            else:
+                p1 &= ~bit
+        else:
+            p1 &= ~bit
+            if -value < capacity[index]:
+                p2 |= bit
+            else:
+                p2 &= ~bit
+    return p1, p2
+
+# Half width of the aspiration window around the value stored for the root (see GameTree.search_root)
+ASPIRATION_WINDOW = 0.5
+
+# Seconds search_root_parallel waits for a worker before it checks the deadline again
+PARALLEL_POLL = 0.02
+
+class SearchTimeout(Exception):
+    # raised inside a timed search when its deadline has passed, see GameTree.iterative_deepening
+    pass
+
 class GameTree:
     """
     Definition: A constructor function that initializes a node.
+    Nodes are expanded only when the search visits them: children stays None until then.
+    A node does not hold a board. It holds the cells its move changed, so the tree's one board
+    can be stepped from the parent position to the node's (GameTree.play_node) and back (GameTree.undo_node).
 
     Parameters:
-    board (list): A two-dimensional list representing the board state represented by the node.
     depth (int): An integer representing the depth or level of the node.
     player (int): An integer representing the player currently playing at the node. Typically 1 or -1.
     tree_height (int): An integer representing the maximum height of the tree. The default value is 4.
+    move (tuple): The (row, col) played by the parent to reach this node. None for the root.
     """
     class Node:
+        __slots__ = ('depth', 'player', 'tree_height', 'move', 'children', 'winning_move', 'undo', 'redo', 'legal')
+
         #initialize the node
-        def __init__(self, board, depth, player, tree_height = 4):
-            self.board = board
+        def __init__(self, depth, player, tree_height = 4, move = None):
             self.depth = depth
             self.player = player
             self.tree_height = tree_height
-            self.children = []
+            self.move = move
+            self.undo = None          # undo log of the move (see hadleOverflow.make_move), once it has been played
+            self.redo = None          # owner counts and key after the move, and the (index, new value) of the cells it changed
+            self.children = None      # child nodes, filled in by GameTree.expand
+            self.winning_move = None  # (row, col) of a move that wins right away, found by GameTree.expand
+            self.legal = None         # (player 1, player 2) masks of the legal cells: the parent's until the node is expanded, then its own
 
     """
     Definition: A constructor function that initializes the root node of the game tree and sets the initial game state.
+    No other node is built here; the search expands nodes as it reaches them.
 
     Parameters:
-    board (lists): A two-dimensional list representing the initial board state.
+    board (lists or BoardState): A two-dimensional list or a BoardState representing the initial board state.
     player (int): An integer representing the current player. Typically 1 or -1.
     tree_height (int): An integer that sets the maximum depth of the tree. The default is 4.
+    table (TranspositionTable): The table of search results to use. A new one is created when omitted;
+                                passing one in lets several searches share what they found.
+    executor (ProcessPoolExecutor): Optional pool of worker processes. When given, the children of the root
+                                    are searched in the workers at the same time, see search_root_parallel.
+    workers (int): The number of worker processes of the executor, how many children are searched at once.
+                   The number of CPUs when omitted.
     """
-    def __init__(self, board, player, tree_height = 4):
+    def __init__(self, board, player, tree_height = 4, table = None, executor = None, workers = None):
         self.player = player            # current player.
-        self.board = copy_board(board)  # initial board state
+        self.board = BoardState.from_board(board)  # the one board of the tree, at the root position between searches
         self.tree_height = tree_height  # maximum depth of the tree
-        self.root = self.Node(self.board, 0, self.player, self.tree_height) #Creates and stores the root node of the tree
-        self.board_list = [self.root] # A list that stores all the nodes of the tree
+        self.root = self.Node(0, self.player, self.tree_height) #Creates and stores the root node of the tree
         self.winning_row = None       # index of the winning row
         self.winning_col = None       # index of the winning_col row
-        self.initialize_tree(self.root) # index of the winning_col row
         self.grid_move = []             # list of possible moves
         self.counter = 0                # counter variable
+        self.table = table if table is not None else TranspositionTable() # results of positions already searched
+        self.nodes = 0                  # number of nodes visited by min_max_evaluation
+        self.deadline = None            # time.perf_counter() value at which a timed search stops
+        self.depth_limited = False      # whether the last search stopped anywhere at tree_height
+        self.completed_depth = 0        # depth of the last search finished by iterative_deepening
+        self.stopped = False            # set by stop(): every search of the tree ends at its next node
+        self.executor = executor        # worker processes for the root search, or None
+        self.workers = workers          # number of worker processes of the executor, None for the CPU count
+        self.killers = {}               # depth -> the last two moves that caused a cutoff at that depth
+        self.history = {}               # (move, player) -> how much the move caused cutoffs, deeper ones weigh more
+        self.evaluation = BoardEvaluation(self.board)  # evaluate_board of the tree's board, kept up to date by play_node and undo_node
 
     """
-    Definition: initializes a game tree from a given node. creates child nodes and recursively initializes the tree for the child nodes.
+    Definition: Expands a node the first time it is needed: finds each possible move and stores the resulting child nodes.
+    A move that can start an overflow is played on the tree's board with make_move, checked for a win, and taken back
+    with unmake_move; its child keeps the cells the move changed instead of a copy of the board. A move that only adds
+    a gem to a cell with room left cannot win while both colours are on the board, so it is not played until the
+    search reaches it (see play_node). A move whose cascade never settles (CascadeLimitError) gets no child.
+    The legal cells come from bit masks kept in the nodes: a node starts with its parent's masks and, when expanded,
+    works out again only the cells its move changed (see legal_masks), so the board is not scanned at every node.
+    Later calls return the stored children without searching for moves again.
 
     Parameters:
-    node:Start node from which to initialize the tree. 
-    This node contains information such as the current game state, the player, and the depth of the tree.
-    """
-    def initialize_tree(self, node):    
-        active_player = node.player
-        opponent_player = -active_player
-
-        # End when the game is over or the depth of the node is greater than or equal to the tree height.
-        if self.is_game_over(node.board, active_player) or node.tree_height <= node.depth:
-            return
-
-        # Find possible moves on the current board
-        possible_moves = self.find_adjacent_neighbors(node.board, node.player)
-        # Sets the first element in the possible moves to be a child node.
-        node.children = possible_moves[0]
-                
-        i = 0
-        # Initialize the tree recursively on all child nodes
-        while i < len(node.children):
-            move = node.children[i]
-            # Creates a new child node based on the current movement.
-            child_node = self.Node(move, node.depth + 1, opponent_player, self.tree_height)
-            
-            # Adds a new child node to the board list.
-            self.board_list.append(child_node)
-            # Initializes the tree for child nodes.
-            self.initialize_tree(child_node)
-            i += 1
-            
+    node: The node to expand. The tree's board must be at the node's position.
+
+    Return Value:
+    list: The child nodes, in the order of find_adjacent_neighbors (row by row, stopping after a winning move).
     """
-    Definition: Find possible moves for a player on a given board and checks whether there is a move that the player can win.
+    def expand(self, node):
+        if node.children is None:
+            board = self.board
+            cells = board.cells
+            capacity = board.topology.capacity
+            coords = board.topology.coords
+            player = node.player
+            both_colours = board.p1_count > 0 and board.p2_count > 0
+            children = []
+
+            # The cells each player may play on: the parent's masks with the cells this node's move changed worked out again
+            # (the root of a new tree has no move, so every cell is looked at)
+            legal = node.legal = legal_masks(board, node.legal, node.redo[1] if node.redo is not None else None)
+
+            # Go through the cells the player may play on (row by row), lowest bit first
+            mask = legal[0] if player > 0 else legal[1]
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                index = low.bit_length() - 1
+                board_cell = cells[index]
+                child = self.Node(node.depth + 1, -player, node.tree_height, coords[index])
+                child.legal = legal
+                children.append(child)
+                if both_colours and abs(board_cell) + 1 < capacity[index]:
+                    continue # no overflow, so no win: played later if the search gets to it
+
+                # Play the move and its overflow, remember what changed, then take it back
+                try:
+                    self.record_move(child, index)
+                except CascadeLimitError:
+                    children.pop()  # the cascade never settles (make_move took it back); the move is left out
+                    continue
+                wins = self.is_game_over(board, player)
+                unmake_move(board, child.undo)
+
+                # Exit the loop as a win move
+                if wins:
+                    node.winning_move = coords[index]
+                    break
+            node.children = children
+        return node.children
+
+    """
+    Definition: Plays a node's move on the tree's board with make_move and keeps the undo log and the changed cells in the node.
 
     Parameters:
-    board (list): A two-dimensional list representing the current game board. 
-    player (int): An integer representing the current player. Positive for player 1, negative for player 2.
+    node: A child node made by expand; the tree's board must be at its parent's position.
+    index (int): The cell index of the node's move.
+    """
+    def record_move(self, node, index):
+        board = self.board
+        cells = board.cells
+        node.undo = make_move(board, index, -node.player)
+        log = node.undo[1]
+        changes = [(i, cells[i]) for i, _ in log] if type(log) is list else cells[:]
+        node.redo = ((board.p1_count, board.p2_count, board.key), changes)
 
-    Return Values:
-    valid_move_list (list): A list containing the board state after performing a valid move. 
-    winning_row (int): The row index of a move that the current player can win. 
-    winning_col (int): The column index of a move that the current player can win. 
-    move_position_list (list of tuples): positions of valid moves. (row index, column index).
     """
-    def find_adjacent_neighbors(self, board, player):
-        # size of the rows and columns on the board
-        rows, cols = len(self.board), len(self.board[0])
+    Definition: Steps the tree's board from the position of a node's parent to the node's position.
+    The first time, the move is played with make_move; afterwards the cells it changed are written back.
 
-        def count_adjacent_cell(row, col):
-            # Define the directions
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # up, down, left, right
-            neighbor_cell = 0
+    Parameters:
+    node: A child node made by expand.
+    """
+    def play_node(self, node):
+        if node.redo is None:
+            self.record_move(node, self.board.topology.index(node.move[0], node.move[1]))
+            changes = node.redo[1]
+        else:
+            board = self.board
+            cells = board.cells
+            counts, changes = node.redo
+            if type(changes) is list:
+                for index, value in changes:
+                    cells[index] = value
+            else:
+                cells[:] = changes  # the whole board after a long cascade
+            board.p1_count, board.p2_count, board.key = counts
+        # score again only the columns the move changed
+        self.evaluation.play([index for index, _ in changes] if type(changes) is list else None)
 
-            for dr, dc in directions:
-                r, c = row + dr, col + dc
-                # Check if given coordinates are within the board's bounds
-                if 0 <= r < rows and 0 <= c < cols:
-                    neighbor_cell += 1
+    """
+    Definition: Steps the tree's board back from a node's position to its parent's; the reverse of play_node.
 
-            return neighbor_cell
+    Parameters:
+    node: A child node made by expand.
+    """
+    def undo_node(self, node):
+        unmake_move(self.board, node.undo)
+        self.evaluation.undo()
 
-        def can_player_play_here(board, row, col, player):
-            # Specific cell values ​​on the board
-            board_row = board[row]
-            board_cell = board_row[col]
+    """
+    Definition: Moves the root of the tree to the node holding the given board, when an earlier search already
+    reached it: the root itself, or a position after one move of each player. The part of the tree below that
+    node is kept, so its children do not have to be played again; the rest of the tree is dropped.
 
-            # Counts the number of adjacent cells for a given cell.
-            adjacent_cell_count = count_adjacent_cell(row, col)
+    Parameters:
+    board (lists or BoardState): The board now to be played on, with self.player to move.
 
-            # Player1 positive, Player2 negative
-            if player > 0:
-                player_sign = 1
-            else:
-                player_sign = -1
+    Return Value:
+    bool: True if the node was found and is now the root, False if the tree does not hold the board.
+    """
+    def advance(self, board):
+        if not isinstance(board, BoardState):
+            board = BoardState.from_board(board)
+
+        # the root, then the replies to each of our moves (the opponent's move children are one level down)
+        found = self.board.key == board.key and self.board == board
+        for child in self.root.children or []:
+            if found:
+                break
+            self.play_node(child)
+            for reply in child.children or []:
+                self.play_node(reply)
+                if self.board.key == board.key and self.board == board:
+                    self.root = reply
+                    found = True
+                    break
+                self.undo_node(reply)
+            if not found:
+                self.undo_node(child)
 
-            # If the cell is empty, move it
-            if board_cell == 0:
-                return True
+        if found:
+            self.nodes = 0
+            self.evaluation = BoardEvaluation(self.board)  # the moves to the new root are never taken back
+        return found
 
-            # If the player's symbol and the cell's symbol are different, movement is not possible.
-            if (player > 0 and board_cell < 0) or (player < 0 and board_cell > 0):
-                return False
+    """
+    Definition: Find possible moves for a player on a given board and checks whether there is a move that the player can win.
 
-            # If the symbol in the cell is the same as the player symbol and there are enough adjacent cells, you can move.
-            if board_cell * player_sign > 0 and abs(board_cell) < adjacent_cell_count:
-                return True
+    Parameters:
+    board (BoardState or list): The current game board. A two-dimensional list is converted to a BoardState.
+    player (int): An integer representing the current player. Positive for player 1, negative for player 2.
 
-            return False
+    Return Values:
+    valid_move_list (list): A list containing the board state (BoardState) after performing a valid move. 
+    winning_row (int): The row index of a move that the current player can win. 
+    winning_col (int): The column index of a move that the current player can win. 
+    move_position_list (list of tuples): positions of valid moves. (row index, column index).
+    """
+    def find_adjacent_neighbors(self, board, player):
+        # The search works on BoardState; a two-dimensional list is converted once here.
+        if not isinstance(board, BoardState):
+            board = BoardState.from_board(board)
+
+        # flat cells of the board, and the shared tables for its shape
+        cells = board.cells
+        capacity = board.topology.capacity
+        coords = board.topology.coords
 
         valid_move_list = []
         winning_row = None
         winning_col = None
         move_position_list = []
 
-        # Iterate through each cell on the board to see if the player has a valid move.
-        i = 0
-        while i < rows and winning_row is None:
-            for j in range(cols):
-                # Check if the player can make a move at position
-                if can_player_play_here(board, i, j, player):
-                    # Copy the current board state to make changes
-                    new_board = copy_board(board)
+        # Iterate through each cell on the board (row by row) to see if the player has a valid move.
+        for index in range(len(cells)):
+            board_cell = cells[index]
+
+            # The cell must be empty, or hold the player's gems and still have room before it overflows.
+            if board_cell == 0 or (board_cell * player > 0 and abs(board_cell) < capacity[index]):
+                # Copy the current board state to make changes (a single buffer copy)
+                new_board = board.clone()
 
-                    # Update the board with the player's move
-                    new_board[i][j] += player
+                # Update the board with the player's move
+                new_board[index] += player
 
-                    # Record the position of the move
-                    move_position_list.append((i, j))
+                # Record the position of the move
+                move_position_list.append(coords[index])
 
-                    # Apply overflow logic to the board
-                    self.overflow_board(new_board)
+                # Apply overflow logic to the board, starting from the played cell
+                self.overflow_board(new_board, coords[index])
 
-                    # Add the valid move to the list
-                    valid_move_list.append(copy_board(new_board))
+                # Add the valid move to the list
+                valid_move_list.append(new_board)
 
-                    # Check if the move resulted in a game win condition
-                    if self.is_game_over(new_board, player):
-                        # Record the win move
-                        winning_row, winning_col = i, j
-                        # Exit the loop as a win move
-                        break
-            i += 1
+                # Check if the move resulted in a game win condition
+                if self.is_game_over(new_board, player):
+                    # Record the win move
+                    winning_row, winning_col = coords[index]
+                    # Exit the loop as a win move
+                    break
 
         return valid_move_list, winning_row, winning_col, move_position_list
 
     """
     Definition: Determines and returns the optimal move from the current state. It uses an alpha-beta pruning algorithm to find the optimal number.
+    Without a time budget the tree is searched to tree_height. With one, the search is deepened one ply at a time
+    (1, 2, 3, ...) and the best move of the last depth that was finished before the deadline is returned.
 
     Parameters:
-    None
+    time_budget (int): Optional time allowed for the search, in milliseconds.
 
     Return Value:
     tuple or None:
     - (int, int): A tuple representing the optimal move location. It is in the format (row index, column index).
     - None: Returns if the optimal move is not found.
     """
-    def get_move(self):        
-        # Initial values ​​for alpha-beta pruning
-        alpha = -float('inf')
-        beta = float('inf')
-        result_move = None
+    def get_move(self, time_budget = None):
+        # The clock starts now, so expanding the root counts against the budget
+        if time_budget is not None:
+            deadline = time.perf_counter() + time_budget / 1000
 
-        # Initialize player optimal values
-        if self.player == 1:
-            best_value = -float('inf')
-        else:
-            best_value = float('inf')
-                    
         # set current node is root node
         curr_node = self.root
 
-        # Find adjacent cells, get the winning row and column, and move position
-        result = self.find_adjacent_neighbors(self.board, self.player)
-        winning_row = result[1]
-        winning_col = result[2]
-        move_position = result[3]
+        # Expand the root: its children are the possible moves, and a winning move is recorded if there is one
+        children_list = self.expand(curr_node)
 
         # Returns the cell position where a win is possible
-        if winning_row is not None:
-            return winning_row, winning_col
+        if curr_node.winning_move is not None:
+            return curr_node.winning_move
+
+        # Nothing to search when the tree has no height or the game is already over
+        if self.tree_height <= 0 or self.is_game_over(self.board, self.player):
+            return None
+
+        if time_budget is None:
+            result_move = self.search_root(children_list)
+        else:
+            result_move = self.iterative_deepening(children_list, deadline)
+
+        # If the optimal move is found, return the move location stored in its node.
+        if result_move is not None:
+            return result_move.move
+
+        # return None if there is no optimal move
+        return None
+
+    """
+    Definition: Searches every child of the root to the current tree_height and picks the best one.
+    This is a principal variation search: the first child gets a full window, or an aspiration window around the
+    value stored for the root when there is one (re-searched with the full window if the value falls outside it).
+    Every other child is first searched with a null window, which only tells whether it beats the best value so far,
+    and is searched again for its exact value only when it does.
+
+    Parameters:
+    children_list (list of Node): The children of the root, in the order they are searched.
+                                  On equal values the first one in this order is kept.
+
+    Return Value:
+    Node or None: The best child, or None if there is no optimal move.
+    """
+    def search_root(self, children_list):
+        if self.executor is not None:
+            result_move, best_value = self.search_root_parallel(children_list)
+        else:
+            result_move = None
+            best_value = -math.inf  # value for the player to move (negamax)
+            entry = self.table.search(self.position_key(self.board, self.player))
+
+            for child in children_list:
+                # Step the board to the child and back again afterwards, even if the search is stopped
+                self.play_node(child)
+                try:
+                    move_value = self.search_child(child, result_move is None, entry, best_value)
+                finally:
+                    self.undo_node(child)
+
+                # Keep the first child with the best value
+                if move_value > best_value:
+                    best_value = move_value
+                    result_move = child
+
+        if result_move is not None:
+            self.table.store(self.position_key(self.board, self.player), self.tree_height, best_value, EXACT, result_move.move,
+                             self.depth_limited)
+        return result_move
+
+    """
+    Definition: Searches one child of the root for search_root. The tree's board must be at the child's position.
+
+    Parameters:
+    child (Node): The child of the root.
+    first (bool): Whether it is the first child searched.
+    entry (tuple): The transposition table entry of the root, or None.
+    best_value (float): The best value of the children searched before it.
+
+    Return Value:
+    float: The value of the child for the player at the root. It is exact for the first child and for a child
+           that beats best_value; otherwise it is only known to be at most best_value.
+    """
+    def search_child(self, child, first, entry, best_value):
+        player = self.player
+        if first:
+            if entry is not None:
+                # aspiration window around the last value found for this position
+                low = entry[1] - ASPIRATION_WINDOW
+                high = entry[1] + ASPIRATION_WINDOW
+                move_value = -self.negamax(child, -high, -low, -player, 1)
+                if move_value <= low or move_value >= high:
+                    move_value = -self.negamax(child, -math.inf, math.inf, -player, 1)
+            else:
+                move_value = -self.negamax(child, -math.inf, math.inf, -player, 1)
+        else:
+            # null window: does this child beat the best value so far?
+            move_value = -self.negamax(child, -math.nextafter(best_value, math.inf), -best_value, -player, 1)
+            if move_value > best_value:
+                move_value = -self.negamax(child, -math.inf, -best_value, -player, 1)
+        return move_value
+
+    """
+    Definition: search_root with the children of the root split across the worker processes of self.executor.
+    Boards are sent as bytes (see BoardState.to_bytes). Children are handed out in order, each with the best
+    value found so far as its alpha (beta for player 2): a child that cannot beat it only returns a bound, so
+    its subtree is cut short, and one that can still returns its exact value. Results are then merged in the
+    original order, so the same child is picked as by search_root.
+
+    Parameters:
+    children_list (list of Node): The children of the root, in the order they are searched.
 
-        # Get the list of children of the current node
-        children_list = list(curr_node.children)
+    Return Value:
+    tuple: The best child (or None if there is no optimal move) and its value for the player to move.
+    """
+    def search_root_parallel(self, children_list):
+        bound = -math.inf  # best value returned so far, for the player to move
+        width = self.workers or os.cpu_count() or 1
+        move_values = [None] * len(children_list)
+        pending = {}
         index = 0
 
-        while index < len(children_list):
-            child = children_list[index]
-            # Calculate the moving value by evaluating the Min-Max algorithm
-            move_value = self.min_max_evaluation(child, alpha, beta, self.player * -1, 1)
-            
-            # Update optimal movement values ​​based on the current player's maximization/minimization criteria.
-            if (self.player == 1 and move_value > best_value) or (self.player == -1 and move_value < best_value):
+        try:
+            while index < len(children_list) or pending:
+                # Keep every worker busy; only values already returned can tighten the window
+                while index < len(children_list) and len(pending) < width:
+                    child = children_list[index]
+                    time_left = None if self.deadline is None else self.deadline - time.perf_counter()
+                    self.play_node(child)
+                    data = self.board.to_bytes()
+                    self.undo_node(child)
+                    future = self.executor.submit(_search_child, self.board.rows, self.board.cols, data,
+                                                  -self.player, self.tree_height, -math.inf, -bound, time_left)
+                    pending[future] = index
+                    index += 1
+
+                # Wait a little at a time, so a deadline or stop() from another thread is noticed while the workers search
+                done, _ = wait(pending, timeout=PARALLEL_POLL, return_when=FIRST_COMPLETED)
+                if self.deadline is not None and time.perf_counter() > self.deadline:
+                    raise SearchTimeout()  # the children still pending are cancelled below
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        raise SearchTimeout()
+                    child_value, nodes, depth_limited = result
+                    move_values[pending.pop(future)] = -child_value
+                    self.nodes += nodes
+                    self.depth_limited = self.depth_limited or depth_limited
+                    bound = max(bound, -child_value)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        # Merge in order, keeping the first best child like search_root
+        result_move = None
+        best_value = -math.inf
+        for child, move_value in zip(children_list, move_values):
+            if move_value > best_value:
                 best_value = move_value
                 result_move = child
+        return result_move, best_value
 
-            index += 1
+    """
+    Definition: Searches the root children at depth 1, 2, 3 and so on until the time budget runs out.
+    The best move of each depth is searched first at the next one, and the transposition table
+    keeps the best moves found deeper in the tree, so each depth is ordered by the one before.
+    The first depth is always finished so there is a move to return. A depth cut short by the
+    deadline is thrown away. Deepening also stops once a depth is searched without reaching
+    the depth limit anywhere, since searching deeper cannot change the result.
 
-        # If the optimal move is found, return the move location.
-        if result_move is not None:
-            counter = 0
-            for child in curr_node.children:
-                if result_move == child:
+    Parameters:
+    children_list (list of Node): The children of the root.
+    deadline (float): The time.perf_counter() value at which the search stops.
+
+    Return Value:
+    Node or None: The best child found by the deepest finished search.
+    """
+    def iterative_deepening(self, children_list, deadline):
+        tree_height = self.tree_height
+        result_move = None
+        depth = 1
+
+        try:
+            while True:
+                self.tree_height = depth
+                self.depth_limited = False
+                # the first depth runs without a deadline
+                self.deadline = deadline if depth > 1 else None
+                if self.stopped:
+                    self.deadline = -math.inf  # stop() was called from another thread, keep its deadline
+
+                # Search the previous best move first
+                ordered = children_list
+                if result_move is not None:
+                    ordered = [result_move] + [child for child in children_list if child is not result_move]
+
+                result_move = self.search_root(ordered)
+                self.completed_depth = depth
+
+                if not self.depth_limited or time.perf_counter() >= deadline:
                     break
-                counter += 1
+                depth += 1
+        except SearchTimeout:
+            pass # keep the result of the last finished depth
+        finally:
+            self.tree_height = tree_height
+            self.deadline = None
 
-            # Return the move position
-            return_row, return_col = move_position[counter]
+        return result_move
 
-            return return_row, return_col
+    """
+    Definition: Stops the search running in another thread (and any later search of the tree): it raises
+    SearchTimeout at its next node, or, in iterative_deepening, returns the last finished depth.
+    The tree should not be searched again afterwards.
+    """
+    def stop(self):
+        self.stopped = True
+        self.deadline = -math.inf
 
-        # return None if there is no optimal move
-        return None
+    """
+    Definition: Describes how far the search running on the tree has got, for showing while it runs.
+
+    Return Value:
+    str: the depth being searched (during iterative_deepening, the current one) and the nodes visited so far.
+    """
+    def progress(self):
+        return f"depth {self.tree_height}, {self.nodes} nodes"
 
     """
     Definition: Computes the optimal evaluation value for the current board state using the Min-Max algorithm. 
+    Player 1 maximizes the value and player 2 minimizes it; the work is done by negamax.
 
     Parameters:
-    board (list): A two-dimensional list representing the current game board state.
+    node (Node): The node of the current game board state; the tree's board must be at its position.
     alpha (float): The maximum optimized value so far. The initial value is negative infinity.
     beta (float): The minimum optimized value so far. The initial value is positive infinity.
     player (int): A value representing the current player. Player 1 is represented as 1, and Player 2 is represented as -1.
@@ -334,49 +764,171 @@ class GameTree:
     Return Value:
     float: The optimal evaluation value for the current board state.
     """
-    def min_max_evaluation(self, board, alpha, beta, player, depth):
-        # Returns the evaluation value (tree maximum height or current depth = tree maximum height or game end)
-        if self.tree_height == 0 or depth >= self.tree_height or self.is_game_over(board, player):
-            return self.evaluate_min_max(board, player)
+    def min_max_evaluation(self, node, alpha, beta, player, depth):
+        if player == 1:
+            return self.negamax(node, alpha, beta, player, depth)
+        return -self.negamax(node, -beta, -alpha, player, depth)
 
-        # Check if the current player is a maximized player or a minimized player
-        is_maximizing_player = self.check_player(player)
-
-        # Player1 initialized to negative infinity, Player2 initialized to positive infinity
-        best_value = -float('inf') if is_maximizing_player else float('inf')
-
-        # Find possible moves given the current board state
-        possible_moves = self.find_adjacent_neighbors(board, player)[0]
+    """
+    Definition: Computes the value of a node for the player to move, with alpha-beta pruning in negamax form:
+    the value of a node is the best of the negated values of its children, so both players share one branch.
+    It is a principal variation search: the first child is searched with the full window, the others with a
+    null window that only tells whether they beat alpha, and one that does is searched again with the full window.
+    The node is expanded here, so only the part of the tree the search reaches is ever built.
+    The value is player * the min_max_evaluation value: evaluate_board(board, player) at the leaves.
 
-        # Sort possible moves by evaluation value
-        possible_moves.sort(key=lambda move: self.evaluate_move(move, player), reverse=is_maximizing_player)
+    Parameters:
+    node (Node): The node of the current game board state; the tree's board must be at its position.
+    alpha (float): The value the player to move is already sure of.
+    beta (float): The value above which the opponent will avoid this node.
+    player (int): The player to move, 1 or -1.
+    depth (int): The depth in the current tree.
 
-        # Repeat for possible moves
-        for move in possible_moves:
-            # Recursively calculate the evaluation values ​​of child nodes
-            eval = self.min_max_evaluation(move, alpha, beta, -player, depth + 1)
-            if is_maximizing_player:
-                # If maximizing player, update best_value
-                best_value = max(best_value, eval)
-                # update alpha
-                alpha = max(alpha, best_value)
-            else:
-                # If minimizing player, update best_value
-                best_value = min(best_value, eval)
-                # update alpha
-                beta = min(beta, best_value)
+    Return Value:
+    float: The value of the node for the player to move. A value at or below alpha is an upper bound,
+           one at or above beta a lower bound; in between it is exact.
+    """
+    def negamax(self, node, alpha, beta, player, depth):
+        board = self.board
+        self.nodes += 1
+
+        # Stop the search when the time budget of get_move has run out
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        # Returns the evaluation value (game end or tree maximum height or current depth = tree maximum height)
+        if self.is_game_over(board, player):
+            return self.evaluation.score(player)
+        if self.tree_height == 0 or depth >= self.tree_height:
+            self.depth_limited = True
+            return self.evaluation.score(player)
+
+        # Look the position up in the transposition table
+        remaining = self.tree_height - depth
+        key = self.position_key(board, player)
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_value, bound, table_move, limited = entry
+            # A result searched at least as deep can be reused if it is exact or already outside the window
+            if entry_depth >= remaining:
+                if bound == EXACT or (bound == LOWER and entry_value >= beta) or (bound == UPPER and entry_value <= alpha):
+                    if limited:
+                        self.depth_limited = True  # the stored search stopped at its depth limit, as this one would have
+                    return entry_value
+        alpha_start = alpha
+        # Whether the search below this node reaches the depth limit, stored with its result
+        limited_before = self.depth_limited
+        self.depth_limited = False
+        best_value = -math.inf
+        best_move = None
+
+        # Find possible moves given the current board state (expands the node on the first visit),
+        # ordered by stored best move, killer moves, then history scores
+        possible_moves = self.order_moves(self.expand(node), player, depth, table_move)
+
+        for index, move in enumerate(possible_moves):
+            # Step the board to the child and back again afterwards, even if the search is stopped
+            self.play_node(move)
+            try:
+                if index == 0:
+                    value = -self.negamax(move, -beta, -alpha, -player, depth + 1)
+                else:
+                    # null window: only tells whether the move is better than alpha
+                    value = -self.negamax(move, -math.nextafter(alpha, math.inf), -alpha, -player, depth + 1)
+                    if alpha < value < beta:
+                        value = -self.negamax(move, -beta, -value, -player, depth + 1)
+            finally:
+                self.undo_node(move)
+
+            if value > best_value:
+                best_value = value
+                best_move = move.move
+            if value > alpha:
+                alpha = value
 
             # Pruning is performed if the alpha value is greater than or equal to the beta value.
-            if beta <= alpha:
+            if alpha >= beta:
+                self.record_cutoff(move.move, player, depth, remaining)
                 break
 
+        # Store the result with the kind of bound it is for the window it was searched with
+        if best_value <= alpha_start:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        limited = self.depth_limited
+        self.depth_limited = limited or limited_before
+        self.table.store(key, remaining, best_value, bound, best_move, limited)
+
         return best_value
+
+    """
+    Definition: Returns the key of a position in the transposition table: the board and the side to move.
+
+    Parameters:
+    board (BoardState): The game board state.
+    player (int): The player to move (1 or -1).
+
+    Return Value:
+    int: The Zobrist key of the position, kept up to date by the board itself (read in O(1)).
+    """
+    def position_key(self, board, player):
+        return board.position_key(player)
     
+    """
+    Definition: Orders the children of a node so that the moves most likely to cause a cutoff are searched first,
+    without evaluating any board: the best move stored in the transposition table, then the killer moves of this
+    depth, then the rest by their history score. Moves with the same score keep their row-by-row order.
+
+    Parameters:
+    children (list of Node): The children to order.
+    player (int): The player making the moves.
+    depth (int): The depth of the node in the current tree.
+    table_move (tuple): The best move stored for the node, or None.
+
+    Return Value:
+    list of Node: The children in the order to search them.
+    """
+    def order_moves(self, children, player, depth, table_move):
+        killers = self.killers.get(depth, ())
+        history = self.history
+
+        def score(child):
+            move = child.move
+            if move == table_move:
+                return float('inf')
+            if move in killers:
+                return 1e12 - killers.index(move)
+            return history.get((move, player), 0)
+
+        return sorted(children, key=score, reverse=True)
+
+    """
+    Definition: Remembers a move that caused a cutoff: it becomes a killer move of its depth,
+    and its history score grows by the square of the depth left below it.
+
+    Parameters:
+    move (tuple): The (row, col) of the move.
+    player (int): The player who made the move.
+    depth (int): The depth of the node where the cutoff happened.
+    remaining (int): The number of plies that were left to search below that node.
+    """
+    def record_cutoff(self, move, player, depth, remaining):
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        key = (move, player)
+        self.history[key] = self.history.get(key, 0) + remaining * remaining
+
     """
     Definition: Estimates the value of a given move. 
 
     Parameters:
-    move (list): A two-dimensional list of board states after the move to be evaluated.
+    move (BoardState): The board state after the move to be evaluated.
     player (int): An integer representing the current player (1 or -1).
 
     Return Value:
@@ -387,31 +939,33 @@ class GameTree:
         return self.evaluate_min_max(move, player)
 
     """
-    Definition: Create a queue to process the board state, and pass the current board state and the queue to the overflow function to process the board.
+    Definition: Pass the board to the overflow function, without keeping any wave history, so the board is left in its final state.
 
     Parameters:
-    board (list): A two-dimensional list representing the current game board state.
+    board (BoardState): The current game board state.
+    start (tuple): The (row, col) that was just played, so the cascade only checks the cells it touches.
 
     Return Value:
-    None
+    int: The number of overflow waves.
     """
-    def overflow_board(self, board):
-        # Create a queue to process board states.
-        overflow_queue = Queue()
-        # Call the verflow function to process the queue and board state.
-        overflow(board, overflow_queue)
+    def overflow_board(self, board, start=None):
+        # No queue: the search only needs the final board, not every wave.
+        return overflow(board, None, start)
 
     """
     Definition: Returns a boolean value, evaluating whether the game is over based on the given board state and players.
 
     Parameters:
-    board (list): A two-dimensional list representing the current game board state.
+    board (BoardState): The current game board state.
     player (int): An integer representing the current player. Usually 1 or -1.
 
     Return Value:
     bool: Returns True if the game is over, False otherwise.
     """
     def is_game_over(self, board, player) -> bool:
+        # While both players still own cells the player cannot have won: the owner counts of a BoardState answer that without a scan.
+        if isinstance(board, BoardState) and board.p1_count and board.p2_count:
+            return False
         # Returns whether the game ends by evaluating whether the player won.
         return evaluate_board(board, player) == 1
 
@@ -431,7 +985,7 @@ class GameTree:
     Definition: Computes an evaluation value for a given board state and player, and returns it multiplied by the player's preference.
 
     Parameters:
-    board (list): A two-dimensional list representing the board states to evaluate.
+    board (BoardState): The board states to evaluate.
     player (int): An integer representing the current player. Typically expressed as 1 or -1.
 
     Return Value:
@@ -444,12 +998,14 @@ class GameTree:
     Definition: A function that prints a given board state to the console.
 
     Parameters:
-    board (list): A two-dimensional list representing the board states to print.
+    board (BoardState or list): The board states to print.
 
     Return Value:
     None:
     """
     def display_board(self, board):       
+        if isinstance(board, BoardState):
+            board = board.to_board()
         for row in board:
             print(' '.join(map(str, row)))
         print()
@@ -458,7 +1014,8 @@ class GameTree:
     Definition: A function that outputs a tree structure with a given node and its children.
 
     Parameters:
-    node (Node): The node of the tree to output. Each node contains a depth, a player, a board state, and children.
+    node (Node): The node of the tree to output. Each node contains a depth, a player, the cells its move changed, and children.
+                 The tree's board must be at the node's position (it is for the root).
     indent (str): A string to add indentation according to the depth of the node when outputting. The default is an empty string.
 
     Return Value:
@@ -469,15 +1026,17 @@ class GameTree:
         print("Depth: {}, Player: {}".format(node.depth, node.player))
 
         # Print the board status of the current node
-        self.display_board(node.board)
+        self.display_board(self.board)
 
-        # Recursively print child nodes
-        for child in node.children:
+        # Recursively print child nodes (only the nodes the search has expanded), stepping the board to each one
+        for child in node.children or []:
+            self.play_node(child)
             self.display_tree(child, indent + "    ")
+            self.undo_node(child)
         
     """
     Definition: A function that recursively cleans up all nodes in a tree. 
-                This function frees up the memory by freeing resources including the node's child nodes and the board.
+                This function frees up the memory by freeing resources including the node's child nodes and the cells its move changed.
 
     Parameters:
     None
@@ -493,15 +1052,46 @@ class GameTree:
             while stack:
                 current = stack.pop()
                 # Process by adding the children of the current node to the stack.
-                stack.extend(current.children)
+                stack.extend(current.children or [])
                 # Initialize properties of current node
-                current.children = []
-                current.board = None
+                current.children = None
+                current.undo = None
+                current.redo = None
         
         # Root node clear
         if self.root:
             clear_node(self.root)
         
-        # Initialize root and board_list
-        self.root = None
-        self.board_list = []    
\ No newline at end of file
+        # Initialize root
+        self.root = None    
+
+
+# Transposition table of a worker process, kept between the children it searches
+_worker_table = None
+
+"""
+Definition: Runs in a worker process for GameTree.search_root_parallel: searches one child of the root.
+
+Parameters:
+rows (int), cols (int), data (bytes): The child board, in the form of BoardState.to_bytes.
+player (int): The player to move on the child board.
+tree_height (int): The maximum depth of the tree; the child is at depth 1.
+alpha (float), beta (float): The search window, for player (see GameTree.negamax).
+time_left (float): Seconds left before the search has to stop, or None for no limit.
+
+Return Value:
+tuple or None: (negamax value for player, nodes visited, whether the depth limit was reached), or None if time ran out.
+"""
+def _search_child(rows, cols, data, player, tree_height, alpha, beta, time_left):
+    global _worker_table
+    if _worker_table is None:
+        _worker_table = TranspositionTable()
+
+    tree = GameTree(BoardState.from_bytes(rows, cols, data), player, tree_height, _worker_table)
+    if time_left is not None:
+        tree.deadline = time.perf_counter() + time_left
+    try:
+        value = tree.negamax(tree.root, alpha, beta, player, 1)
+    except SearchTimeout:
+        return None
+    return value, tree.nodes, tree.depth_limited
@@ -1,28 +1,17 @@
 from dataInput import Queue
+from boardTopology import get_topology
+from boardState import BoardState
 
 def get_overflow_list(grid):  # returning spots which is overflows
     rows = len(grid)          # total number of rows
     cols = len(grid[0])       # total number of cols
+    topology = get_topology(rows, cols)  # capacity of every cell (corner 2, edge 3, middle 4)
     overflowing_cells = []    # empty initially
 
-    def spot_in_corner(r, c): # this is case of spot in corner within grid, having 2 neighbors
-        return (r == 0 or r == rows - 1) and (c == 0 or c == cols - 1)
-
-    def spot_in_edge(r, c):   # this is case of edge in corner within grid, having 3 neighbors
-        return (r == 0 or r == rows - 1 or c == 0 or c == cols - 1) and not spot_in_corner(r, c)
-
     for r in range(rows):
         for c in range(cols):
-            value = abs(grid[r][c]) 
-            if spot_in_corner(r, c):
-                if value >= 2:
-                    overflowing_cells.append((r, c))
-            elif spot_in_edge(r, c):
-                if value >= 3:
-                    overflowing_cells.append((r, c))
-            else:
-                if value >= 4:
-                    overflowing_cells.append((r, c))
+            if abs(grid[r][c]) >= topology.capacity[r * cols + c]:
+                overflowing_cells.append((r, c))
 
     if not overflowing_cells:  # case no overflowing_cells, empty overflow cells than should return none 
         return None
@@ -30,34 +19,215 @@ def get_overflow_list(grid):  # returning spots which is overflows
     return overflowing_cells
 
 
-def overflow(grid, a_queue):
-    overflow_cells = get_overflow_list(grid)
-    sign_flag = is_same_sign(grid)
-    if overflow_cells is not None and not sign_flag:  # this is only meaning that grid is overflow
-        for r, c in overflow_cells:
-            # set sign of cell
-            original_sign = 1 if grid[r][c] > 0 else -1
-            
+class CascadeLimitError(RuntimeError):
+    # raised when a cascade runs past its wave budget or starts repeating itself
+    def __init__(self, message, waves):
+        super().__init__(message)
+        self.waves = waves  # waves already applied to the grid when the cascade was stopped
+
+
+def overflow(grid, a_queue=None, start=None, max_waves=None, undo=None):
+    # start is the (row, col) just played. With it, only that cell is checked on the first wave
+    # and afterwards only the neighbours touched by the previous wave, instead of rescanning
+    # the whole grid on every wave. Without it (or when the board held a single colour before
+    # the move, so an earlier cascade may have left full cells behind) every cell is checked first.
+    # Each wave is put in a_queue as the list of (cell index, new value) pairs it changed, the
+    # index being row * cols + col; apply_wave replays one onto a board. With a_queue None no
+    # history is kept at all: the grid is just left in its final state (what the AI search wants).
+    # max_waves caps the cascade length; CascadeLimitError is raised when it is hit, and also
+    # when the cascade comes back to a board it already had (it would never end).
+    # grid is either a two-dimensional list or a BoardState, which is worked on directly.
+    # undo is an optional list: every cell the cascade writes is appended to it as (index, old value)
+    # before the write, so the cascade can be taken back (see make_move and unmake_move).
+    # The cells owned by each player are counted as they change, so checking whether one
+    # colour is left before every wave costs nothing. The Zobrist key of a BoardState is
+    # updated the same way, cell by cell, so it is current once the cascade settles.
+    if isinstance(grid, BoardState):
+        topology = grid.topology
+        cells = grid.cells
+        p1_count, p2_count = grid.p1_count, grid.p2_count
+        key = grid.key
+    else:
+        topology = get_topology(len(grid), len(grid[0]))
+        cells = [value for row in grid for value in row]  # flat copy, index = row * cols + col
+        p1_count = sum(1 for value in cells if value > 0)
+        p2_count = sum(1 for value in cells if value < 0)
+        key = 0  # lists have no key; the updates to it are simply dropped
+
+    if start is None:
+        candidates = range(topology.size)
+    else:
+        index = topology.index(start[0], start[1])
+        candidates = [index]
+        if abs(cells[index]) == 1:
+            # freshly placed gem: if the board had one colour before the move (the mover had no
+            # other cell, or the opponent has none), earlier cascades may have left full cells
+            if cells[index] > 0:
+                had_one_colour = p1_count == 1 or p2_count == 0
+            else:
+                had_one_colour = p2_count == 1 or p1_count == 0
+            if had_one_colour:
+                candidates = range(topology.size)
+
+    try:
+        waves, p1_count, p2_count, key = _cascade(cells, topology, a_queue, candidates, max_waves, p1_count, p2_count, key, undo)
+    except CascadeLimitError:
+        # keep the waves that were applied
+        if isinstance(grid, BoardState):
+            grid.recount()
+        else:
+            _write_back(grid, cells, topology.cols)
+        raise
+
+    if isinstance(grid, BoardState):
+        grid.p1_count, grid.p2_count = p1_count, p2_count  # cells were worked on in place
+        grid.key = key
+    elif waves:
+        _write_back(grid, cells, topology.cols)
+    return waves
+
+
+def _write_back(grid, cells, cols):
+    # copies the flat cells back into the caller's rows
+    for r in range(len(grid)):
+        grid[r][:] = cells[r * cols:(r + 1) * cols]
+
+
+def _cascade(cells, topology, a_queue, candidates, max_waves, p1_count, p2_count, key, undo):
+    # runs the waves in a loop, looking only at the candidate cells of each wave (row-major order kept)
+    # returns the number of waves, the updated cell counts of both players and the updated key
+    capacity = topology.capacity
+    neighbors = topology.neighbors
+    zobrist = topology.zobrist
+    waves = 0
+
+    # gems are never created, so a cascade can only repeat a board while its gem total stays
+    # the same. Once that has lasted longer than the board has cells, boards are compared
+    # against a saved one (Brent's cycle check: saved again after 1, 2, 4, ... waves).
+    steady_waves = 0
+    saved_cells = None
+    saved_power = 1
+    saved_age = 0
+
+    while True:
+        if not p1_count or not p2_count:  # only one colour left: grid is settled
+            return waves, p1_count, p2_count, key
+        overflow_cells = [i for i in sorted(candidates) if abs(cells[i]) >= capacity[i]]
+        if not overflow_cells:  # grid is settled
+            return waves, p1_count, p2_count, key
+        if max_waves is not None and waves >= max_waves:
+            raise CascadeLimitError('overflow cascade still running after %d waves' % waves, waves)
+
+        # the last overflowing cell decides the sign of the wave
+        original_sign = 1 if cells[overflow_cells[-1]] > 0 else -1
+
+        gems_change = 0
+        for i in overflow_cells:
             # set cell value to 0
-            grid[r][c] = 0
-
-        for r, c in overflow_cells:
+            value = cells[i]
+            if value > 0:
+                p1_count -= 1
+            else:
+                p2_count -= 1
+            gems_change += len(neighbors[i]) - abs(value)
+            key ^= zobrist[i][value]
+            if undo is not None:
+                undo.append((i, value))
+            cells[i] = 0
+
+        candidates = set()
+        for i in overflow_cells:
             # updating neighbors
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < len(grid) and 0 <= nc < len(grid[0]):
-                    grid[nr][nc] = abs(grid[nr][nc]) + 1  # neighbor update logic absolute calculation
-                    grid[nr][nc] *= original_sign
-
-        #a_queue.enqueue(grid) # my initial version with swallow copy (problem)
-        a_queue.enqueue([row.copy() for row in grid]) # deep copying grid to queue
-        #return overflow(grid, a_queue) # my initial version is just calling overflow recursively
-        return 1 + overflow(grid, a_queue) # count how many times recursive function has called
-
+            for n in neighbors[i]:
+                value = cells[n]
+                if value > 0:
+                    p1_count -= 1
+                elif value < 0:
+                    p2_count -= 1
+                new_value = (abs(value) + 1) * original_sign  # neighbor update logic absolute calculation
+                key ^= zobrist[n][value] ^ zobrist[n][new_value]
+                if undo is not None:
+                    undo.append((n, value))
+                cells[n] = new_value
+                candidates.add(n)  # only the cells touched by this wave can overflow on the next one
+            # every neighbour now belongs to the player of the wave
+            if original_sign > 0:
+                p1_count += len(neighbors[i])
+            else:
+                p2_count += len(neighbors[i])
+
+        if a_queue is not None:
+            # record only what this wave changed: (cell index, new value) pairs, see apply_wave
+            changed = candidates.union(overflow_cells)
+            a_queue.enqueue([(i, cells[i]) for i in sorted(changed)])
+        waves += 1 # count how many waves happened
+
+        if gems_change < 0:
+            steady_waves = 0
+            saved_cells = None
+            saved_power = 1
+            saved_age = 0
+        else:
+            steady_waves += 1
+            if steady_waves > topology.size:
+                current = tuple(cells)
+                if current == saved_cells:
+                    raise CascadeLimitError('overflow cascade repeats itself after %d waves' % waves, waves)
+                saved_age += 1
+                if saved_cells is None or saved_age >= saved_power:
+                    saved_cells = current
+                    saved_power *= 2
+                    saved_age = 0
+
+
+def make_move(board, index, player, max_waves=None):
+    # plays one gem of player on cell index of a BoardState, cascade included, in place
+    # returns the undo log for unmake_move: the owner counts and key before the move, and the
+    # (index, old value) of every cell written, in the order they were written.
+    # When the cascade raises CascadeLimitError the move is taken back before the error is passed on.
+    cells = board.cells
+    before = (board.p1_count, board.p2_count, board.key)
+    log = [(index, cells[index])]
+    value = cells[index] + player
+    board[index] = value
+    # with both colours on the board before the move, only a cell that just filled up can start a cascade
+    if abs(value) >= board.topology.capacity[index] or not before[0] or not before[1]:
+        try:
+            overflow(board, None, board.topology.coords[index], max_waves, log)
+        except CascadeLimitError:
+            unmake_move(board, (before, log))
+            raise
+        if len(log) > 8:
+            # a long cascade: keep a copy of the cells from before the move instead, written back in one go
+            original = cells[:]
+            for i, old in reversed(log):
+                original[i] = old
+            log = original
+    return before, log
+
+
+def unmake_move(board, undo):
+    # takes back a move played by make_move: old values are written back newest first,
+    # so a cell written several times ends with the value it had before the move
+    before, log = undo
+    cells = board.cells
+    if type(log) is list:
+        for index, value in reversed(log):
+            cells[index] = value
     else:
-        #return len(a_queue) # my original version return length at last step bur fixed
-        return 0
-
+        cells[:] = log  # the whole board from before the move
+    board.p1_count, board.p2_count, board.key = before
+
+
+def apply_wave(grid, wave):
+    # steps grid forward by one wave recorded by overflow()
+    if isinstance(grid, BoardState):
+        for index, value in wave:
+            grid[index] = value  # keeps the owner counts up to date
+        return
+    cols = len(grid[0])
+    for index, value in wave:
+        grid[index // cols][index % cols] = value
 
 
 def is_same_sign(grid): # function for checking second statement of overflow (if all sign is same then grid is not overflow)
@@ -150,3 +150,74 @@ class HashTable:
             if chaining is not None:
                 for key, value in chaining:
                     self.insert(key, value) # Reinsert all items into the new table
+
+
+class BoundedHashTable(HashTable):
+    """
+    Definition:
+    A HashTable whose memory stays capped: it never resizes, and each bucket holds at most
+    bucket_size key-value pairs. Inserting a new key into a full bucket evicts one of its pairs,
+    chosen by _evict (the oldest one by default), so at most capacity * bucket_size pairs are stored.
+
+    Parameters:
+    capacity (default value is 32): The number of buckets, fixed for the life of the table.
+    bucket_size (default value is 4): The maximum number of pairs in one bucket.
+    """
+    def __init__(self, capacity=32, bucket_size=4):
+        super().__init__(capacity)
+        self.bucket_size = bucket_size # Maximum number of pairs per bucket
+        self.evictions = 0 # Number of pairs evicted to make room
+
+    """
+    Definition: 
+    insert adds a key-value pair to the hash table, evicting a pair from the bucket when it is full.
+
+    Parameters:
+    key: The key to be inserted.
+    value: The value associated with the key.
+    
+    Return: 
+    Returns True if the key-value pair is inserted; otherwise, returns False if the key already exists.
+    """
+    def insert(self, key, value):
+        index = hash(key) % self._capacity # Compute hash index
+        bucket = self.table[index] # Get the bucket at the index
+        if bucket is None:
+            self.table[index] = [(key, value)] # Create new bucket with pair
+            self.size += 1
+            return True
+
+        for item in bucket:
+            if item[0] == key:
+                return False # Key already exists
+
+        if len(bucket) >= self.bucket_size:
+            bucket.pop(self._evict(bucket)) # Make room in the full bucket
+            self.size -= 1
+            self.evictions += 1
+
+        bucket.append((key, value)) # Add new key-value pair
+        self.size += 1
+        return True
+
+    """
+    Definition: 
+    _evict is the replacement policy: it picks the pair to remove from a full bucket.
+    Pairs are appended as they are inserted, so index 0 is the oldest one.
+
+    Parameters:
+    bucket: The full bucket, a list of (key, value) pairs.
+
+    Return: 
+    The index of the pair to remove.
+    """
+    def _evict(self, bucket):
+        return 0
+
+    """
+    Definition: 
+    Removes every pair; the capacity stays the same.
+    """
+    def clear(self):
+        self.table = [None] * self._capacity
+        self.size = 0
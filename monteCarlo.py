@@ -0,0 +1,194 @@
+import math
+import random
+import time
+from bitBoard import BitBoard, iter_bits
+from hadleOverflow import CascadeLimitError
+
+"""
+Definition: Settings of the Monte Carlo tree search.
+EXPLORATION is the UCT constant: higher values try rarely visited moves more often.
+ROLLOUT_LIMIT is the number of plies a random game may last before it is scored as a draw.
+"""
+EXPLORATION = math.sqrt(2)
+ROLLOUT_LIMIT = 200
+
+class MonteCarloNode:
+    """
+    Definition:
+    A position of the Monte Carlo tree. Children are added one per playout (untried holds the moves
+    without a child yet), so the tree grows where the playouts go.
+
+    Parameters:
+    position (BitBoard): the position, owned by the node.
+    player (int): the player to move, 1 or -1.
+    move (int): cell index of the move that led here, None at the root.
+    parent (MonteCarloNode): the node the move was played from, None at the root.
+
+    Attributes:
+    visits (int): playouts that went through the node.
+    score (float): sum of their results for the player who moved into the node (win 1, draw 0.5).
+    winner (int): 1 or -1 when the game is over at this node, 0 otherwise.
+    """
+    __slots__ = ('position', 'player', 'move', 'parent', 'children', 'untried', 'visits', 'score', 'winner')
+
+    def __init__(self, position, player, move=None, parent=None):
+        self.position = position
+        self.player = player
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.winner = position.winner()
+        self.untried = [] if self.winner else list(iter_bits(position.legal_moves(player)))
+        self.visits = 0
+        self.score = 0.0
+
+
+class MonteCarloTree:
+    """
+    Definition:
+    Monte Carlo tree search with UCT selection. Each playout walks down the tree picking the child
+    with the best upper confidence bound, adds one child, finishes the game with random moves on a
+    BitBoard (the cascade keeps no history, so a random game costs little) and adds the result to
+    every node it went through. The move played is the most visited one.
+
+    Parameters:
+    board (list of lists or BoardState): the position to move from.
+    player (int): the player to move, 1 or -1.
+    playouts (int): the number of playouts when no time budget is given.
+    seed: optional seed of the random moves, for games that can be replayed.
+    """
+    def __init__(self, board, player, playouts=2000, seed=None):
+        self.root = MonteCarloNode(BitBoard.from_board(board), player)
+        self.cols = self.root.position.topology.cols
+        self.playouts = playouts
+        self.random = random.Random(seed)
+        self.random.shuffle(self.root.untried)
+        self.runs = 0  # playouts run by get_move
+        self.stopped = False  # set by stop()
+
+    """
+    Definition:
+    Runs the playouts and picks a move.
+
+    Parameters:
+    time_budget (int): optional milliseconds to search for, instead of the playout count.
+
+    Return Value:
+    tuple: the (row, col) of the move, or None when the game is already over or the search was
+    stopped before its first playout.
+    """
+    def get_move(self, time_budget=None):
+        root = self.root
+        if root.winner or not root.untried and not root.children:
+            return None
+        # a move that wins on the spot needs no playouts
+        for index in root.untried:
+            position = root.position.clone()
+            try:
+                position.play(index, root.player)
+            except CascadeLimitError:
+                continue
+            if position.winner() == root.player:
+                return divmod(index, self.cols)
+
+        deadline = None if time_budget is None else time.perf_counter() + time_budget / 1000
+        while not self.stopped:
+            if deadline is None:
+                if self.runs >= self.playouts:
+                    break
+            elif time.perf_counter() >= deadline and self.runs:
+                break
+            self.playout()
+            self.runs += 1
+
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        return divmod(best.move, self.cols)
+
+    """
+    Definition: Stops get_move running in another thread after the playout it is in; it returns the best move so far.
+    """
+    def stop(self):
+        self.stopped = True
+
+    """
+    Definition: Describes how far get_move has got, for showing while it runs.
+    """
+    def progress(self):
+        return f"{self.runs} playouts"
+
+    """
+    Definition: Runs one playout: selection, expansion, a random game and the update of the visited nodes.
+    """
+    def playout(self):
+        node = self.root
+        while not node.untried and node.children:
+            node = self.select(node)
+
+        if node.untried:
+            index = node.untried.pop()
+            position = node.position.clone()
+            try:
+                position.play(index, node.player)
+            except CascadeLimitError:
+                position = None  # the move never settles; it is left out
+            if position is not None:
+                child = MonteCarloNode(position, -node.player, index, node)
+                self.random.shuffle(child.untried)
+                node.children.append(child)
+                node = child
+
+        winner = node.winner if node.winner else self.rollout(node.position, node.player)
+        while node is not None:
+            node.visits += 1
+            if winner == -node.player:
+                node.score += 1.0
+            elif winner == 0:
+                node.score += 0.5
+            node = node.parent
+
+    """
+    Definition: Returns the child of node with the highest upper confidence bound (UCT).
+    """
+    def select(self, node):
+        log_visits = math.log(node.visits)
+        best, best_bound = None, -1.0
+        for child in node.children:
+            bound = child.score / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if bound > best_bound:
+                best, best_bound = child, bound
+        return best
+
+    """
+    Definition:
+    Plays random moves from a position until one colour is left.
+
+    Parameters:
+    position (BitBoard): the position, left untouched.
+    player (int): the player to move.
+
+    Return Value:
+    int: the winner, 1 or -1, or 0 when the game did not end within ROLLOUT_LIMIT plies
+    or a cascade never settled.
+    """
+    def rollout(self, position, player):
+        position = position.clone()
+        uniform = self.random.random
+        size = position.topology.size
+        for _ in range(ROLLOUT_LIMIT):
+            winner = position.winner()
+            if winner:
+                return winner
+            # a random cell until a legal one comes up: most cells are legal, so this takes a
+            # couple of tries instead of listing the moves
+            moves = position.legal_moves(player)
+            index = int(uniform() * size)
+            while not (moves >> index) & 1:
+                index = int(uniform() * size)
+            try:
+                position.play(index, player)
+            except CascadeLimitError:
+                return 0
+            player = -player
+        return position.winner()
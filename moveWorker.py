@@ -0,0 +1,71 @@
+import threading
+
+class MoveWorker:
+    """
+    Definition:
+    Asks a bot for its move in a background thread, so the game loop can keep handling events and
+    drawing while the bot searches. The loop polls done() each frame and takes result() once it is
+    True; progress() describes the search in the meantime. cancel() stops the search and waits for
+    the thread, so the bot is free for the next game as soon as it returns.
+
+    Parameters:
+    bot: a player with get_play(board) and a tree attribute holding its current search
+         (PlayerOne, PlayerTwo or PlayerMonteCarlo).
+    board (list of lists or BoardState): the position to move from; the worker's own copy.
+
+    Attributes:
+    cancelled (bool): whether cancel() was called; the move of a cancelled worker is never used.
+    """
+    def __init__(self, bot, board):
+        self.bot = bot
+        self.cancelled = False
+        self._move = None
+        self._error = None  # exception raised by get_play, raised again by result()
+        self._thread = threading.Thread(target=self._run, args=(board,), daemon=True)
+        self._thread.start()
+
+    def _run(self, board):
+        try:
+            self._move = self.bot.get_play(board)
+        except Exception as error:
+            self._error = error
+
+    """
+    Definition: Tells whether the bot has picked its move.
+    """
+    def done(self):
+        return not self._thread.is_alive()
+
+    """
+    Definition:
+    Returns the bot's move. Only call it once done() is True.
+
+    Return Value:
+    tuple: the (row, col) the bot played. An exception raised by the bot is raised here instead.
+    """
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._move
+
+    """
+    Definition: Describes how far the bot's search has got, e.g. "depth 3, 5120 nodes" or "800 playouts".
+    """
+    def progress(self):
+        tree = self.bot.tree
+        return tree.progress() if tree is not None else ""
+
+    """
+    Definition:
+    Stops the bot's search and waits for the thread to end. The bot may only create its tree after the
+    first stop, so every tree it holds is stopped until the thread is gone. The stopped tree is dropped,
+    so the bot's next move starts a new one.
+    """
+    def cancel(self):
+        self.cancelled = True
+        while self._thread.is_alive():
+            tree = self.bot.tree
+            if tree is not None:
+                tree.stop()
+            self._thread.join(0.01)
+        self.bot.tree = None
@@ -0,0 +1,236 @@
+"""
+Definition:
+Opening book: the best move of every position the first plies of a game can reach, for each
+board size. Every game starts from the same position (player 1 in the top left corner, player 2
+in the bottom right one, player 1 to move), so these positions are searched once, offline and
+deeper than the bots search during a game, and the bots read the answers instead.
+
+The book is one binary file, memory-mapped when it is opened, so a lookup reads a few records
+in place instead of loading the whole file. Layout (little endian):
+header: magic b'OVBK', format version (H), number of sections (H)
+sections, one per board size: rows, cols, plies, depth (B each), first entry, entry count (I each)
+entries: position key (Q), cell index of the move (H), sorted by key within their section
+The position key is BoardState.position_key, so it covers the side to move.
+
+Build it with: python openingBook.py [--plies ...] [--depth ...]
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from boardState import BoardState
+from boardTopology import BOARD_SIZES
+from hadleOverflow import make_move
+from gameBoard import GameTree
+from transpositionTable import TranspositionTable
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openingBook.bin')
+BOOK_MAGIC = b'OVBK'
+BOOK_VERSION = 1
+
+# plies covered and search depth per board size; bigger boards take far longer per search
+DEFAULT_PLIES = {(3, 4): 4, (4, 5): 3, (5, 6): 2}
+DEFAULT_DEPTH = 6
+
+_HEADER = struct.Struct('<4sHH')
+_SECTION = struct.Struct('<BBBBII')
+_ENTRY = struct.Struct('<QH')
+
+"""
+Definition: Returns the position every game on a board of the given shape starts from.
+"""
+def start_position(rows, cols):
+    board = BoardState(rows, cols)
+    board.set(0, 0, 1)
+    board.set(rows - 1, cols - 1, -1)
+    return board
+
+
+class OpeningBook:
+    """
+    Definition:
+    Read-only view of a book file. The file is memory-mapped and stays open until close().
+
+    Parameters:
+    path (str): the book file, BOOK_FILE when omitted.
+    """
+    def __init__(self, path=BOOK_FILE):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._map.close()
+            raise ValueError('%s is not an opening book of version %d' % (path, BOOK_VERSION))
+
+        self.sections = {}  # (rows, cols) -> (plies, depth, first entry offset, entry count)
+        entries = _HEADER.size + count * _SECTION.size
+        for i in range(count):
+            rows, cols, plies, depth, first, length = _SECTION.unpack_from(self._map, _HEADER.size + i * _SECTION.size)
+            self.sections[(rows, cols)] = (plies, depth, entries + first * _ENTRY.size, length)
+
+    """
+    Definition:
+    Looks up the book move of a position.
+
+    Parameters:
+    board (list of lists or BoardState): the position.
+    player (int): the player to move, 1 or -1.
+
+    Return Value:
+    tuple: the (row, col) of the move, or None when the position is not in the book.
+    """
+    def lookup(self, board, player):
+        if isinstance(board, BoardState):
+            rows, cols = board.rows, board.cols
+        else:
+            rows, cols = len(board), len(board[0])
+        section = self.sections.get((rows, cols))
+        if section is None:
+            return None
+        if not isinstance(board, BoardState):
+            board = BoardState.from_board(board)
+        key = board.position_key(player)
+
+        # binary search of the sorted keys, read in place from the mapped file
+        offset, count = section[2], section[3]
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, index = _ENTRY.unpack_from(self._map, offset + middle * _ENTRY.size)
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                # a key collision with a position from outside the book must not give an illegal move
+                if index < len(board) and board[index] * player >= 0:
+                    return board.topology.coords[index]
+                return None
+        return None
+
+    def __len__(self):
+        return sum(section[3] for section in self.sections.values())
+
+    def close(self):
+        self._map.close()
+
+
+_book = None
+
+"""
+Definition:
+Opens the default book file once and shares it between callers.
+
+Return Value:
+OpeningBook: the book, or None when there is no readable book file.
+"""
+def open_book():
+    global _book
+    if _book is None:
+        try:
+            _book = OpeningBook()
+        except (OSError, ValueError):
+            return None
+    return _book
+
+
+"""
+Definition:
+Searches every position the first plies of a game can reach on one board size.
+Positions reached by several orders of moves are searched once; won positions are left out.
+
+Parameters:
+rows (int), cols (int): the board size.
+plies (int): the number of plies covered; positions with plies or more moves played are left out.
+depth (int): the search depth of each position.
+executor: optional ProcessPoolExecutor the root searches are split across.
+progress (function): optional, called with (ply, positions searched, positions at that ply).
+workers (int): the number of processes of the executor, the CPU count when omitted.
+
+Return Value:
+dict: position key -> cell index of the best move.
+"""
+def build_section(rows, cols, plies, depth, executor=None, progress=None, workers=None):
+    table = TranspositionTable()
+    moves = {}
+    level = {}
+    board = start_position(rows, cols)
+    level[board.position_key(1)] = (board, 1)
+    for ply in range(plies):
+        following = {}
+        for done, (key, (board, player)) in enumerate(level.items()):
+            if board.one_colour():
+                continue
+            (row, col) = GameTree(board, player, depth, table, executor, workers).get_move()
+            moves[key] = row * cols + col
+            if progress is not None:
+                progress(ply, done + 1, len(level))
+            if ply + 1 == plies:
+                continue
+            for index in range(len(board)):
+                if board[index] * player >= 0:
+                    child = board.clone()
+                    make_move(child, index, player)
+                    following.setdefault(child.position_key(-player), (child, -player))
+        level = following
+    return moves
+
+
+"""
+Definition:
+Writes a book file.
+
+Parameters:
+path (str): the file to write.
+sections (dict): (rows, cols) -> (plies, depth, moves), moves as returned by build_section.
+"""
+def write_book(path, sections):
+    header = [_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(sections))]
+    entries = []
+    first = 0
+    for (rows, cols), (plies, depth, moves) in sorted(sections.items()):
+        header.append(_SECTION.pack(rows, cols, plies, depth, first, len(moves)))
+        for key in sorted(moves):
+            entries.append(_ENTRY.pack(key, moves[key]))
+        first += len(moves)
+    with open(path, 'wb') as file:
+        file.write(b''.join(header + entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the opening book of the bots.')
+    parser.add_argument('--output', default=BOOK_FILE, help='book file to write')
+    parser.add_argument('--plies', type=int, nargs=len(BOARD_SIZES),
+                        default=[DEFAULT_PLIES[size] for size in BOARD_SIZES],
+                        help='plies covered on the 3x4, 4x5 and 5x6 boards')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help='search depth of each position')
+    parser.add_argument('--workers', type=int, default=0, help='processes to split each search across')
+    args = parser.parse_args()
+
+    executor = None
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(args.workers)
+
+    def progress(ply, done, total):
+        print('\r  ply %d: %d/%d positions' % (ply, done, total), end='', flush=True)
+
+    sections = {}
+    try:
+        for (rows, cols), plies in zip(BOARD_SIZES, args.plies):
+            print('%dx%d, %d plies, depth %d' % (rows, cols, plies, args.depth))
+            start = time.perf_counter()
+            moves = build_section(rows, cols, plies, args.depth, executor, progress, args.workers)
+            sections[(rows, cols)] = (plies, args.depth, moves)
+            print('\n  %d positions in %.1f s' % (len(moves), time.perf_counter() - start))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    write_book(args.output, sections)
+    print('wrote %s (%d bytes)' % (args.output, os.path.getsize(args.output)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,57 @@
 from gameBoard import GameTree
+from transpositionTable import TranspositionTable
+from openingBook import open_book
+from endgameTable import open_table
+from pondering import Ponderer
 
 class PlayerTwo:
 
-    def __init__(self, name = "P2 Bot"):
+    def __init__(self, name = "P2 Bot", time_budget = None, executor = None, workers = None, use_book = True, use_table = True, ponder = False):
         self.name = name
+        self.time_budget = time_budget  # milliseconds per move; None searches to the fixed depth
+        self.executor = executor        # optional ProcessPoolExecutor to split the root search across
+        self.workers = workers          # number of processes of the executor, None for the CPU count
+        self.table = TranspositionTable()  # search results, kept from one move to the next
+        self.tree = None                # tree of the last search, reused when the game continues from it
+        self.book = open_book() if use_book else None  # moves searched offline for the first plies of a game
+        self.endgame = open_table() if use_table else None  # exact results of the 3x4 board, once it is built
+        self.ponder = ponder            # whether to search the opponent's replies during their turn
+        self.ponderer = Ponderer(-1, self.table)
 
     def get_name(self):
         return self.name
 
     def get_play(self, board):
-        tree = GameTree(board, -1)
-        (row,col) = tree.get_move()
-        return (row,col)
\ No newline at end of file
+        # The opponent has moved: stop pondering, keeping the search of this position if it was pondered
+        pondered = self.ponderer.stop(board)
+        (row,col) = self.choose_move(board, pondered)
+        # Think about the replies while the opponent picks one
+        if self.ponder:
+            self.ponderer.start(board, (row,col))
+        return (row,col)
+
+    def stop_pondering(self):
+        self.ponderer.stop()
+
+    def choose_move(self, board, pondered = None):
+        # Perfect play from the endgame table where it covers the position
+        if self.endgame is not None:
+            move = self.endgame.best_move(board, -1)
+            if move is not None:
+                return move
+        # The opening book answers the first moves of a game without searching
+        if self.book is not None:
+            move = self.book.lookup(board, -1)
+            if move is not None:
+                return move
+        # A search finished while pondering is the one this move needs (a timed search goes on from its tree)
+        if pondered is not None:
+            self.tree, move = pondered
+            self.tree.executor = self.executor
+            self.tree.workers = self.workers
+            if self.time_budget is None:
+                return move
+        # Continue from the last tree when the opponent's reply is in it, otherwise start a new one
+        elif self.tree is None or not self.tree.advance(board):
+            self.tree = GameTree(board, -1, table=self.table, executor=self.executor, workers=self.workers)
+        return self.tree.get_move(self.time_budget)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from monteCarlo import MonteCarloTree
+
+class PlayerMonteCarlo:
+
+    def __init__(self, player, name = None, playouts = 2000, time_budget = None, seed = None):
+        self.player = player            # 1 plays first, -1 second
+        self.name = name if name is not None else "P%d MCTS" % (1 if player > 0 else 2)
+        self.playouts = playouts        # playouts per move when there is no time budget
+        self.time_budget = time_budget  # milliseconds per move; None runs the playout count
+        self.seed = seed                # seed of the random playouts, None for a new game every time
+        self.tree = None                # tree of the last search
+
+    def get_name(self):
+        return self.name
+
+    def get_play(self, board):
+        # A new tree from the current position every turn
+        self.tree = MonteCarloTree(board, self.player, self.playouts, self.seed)
+        (row,col) = self.tree.get_move(self.time_budget)
+        return (row,col)
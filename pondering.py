@@ -0,0 +1,145 @@
+import math
+import threading
+from boardState import BoardState
+from gameBoard import GameTree, SearchTimeout, evaluate_board
+from hadleOverflow import make_move, unmake_move
+
+class Ponderer:
+    """
+    Definition:
+    Searches ahead during the opponent's turn. Once the bot has picked its move, a background thread
+    goes through the opponent's possible replies, likeliest first, and runs the bot's own search on
+    the position each one leads to. When the opponent's move comes in, stop() ends the thread and hands
+    back the search of that position if it was pondered; any other work is dropped. Every search
+    writes to the bot's transposition table, so even a reply that was only partly searched, or a
+    miss, starts from the results already stored.
+    The thread only uses its own trees and the table; the bot must call stop() before searching
+    with the same table again.
+
+    Parameters:
+    player (int): the bot's player, 1 or -1.
+    table (TranspositionTable): the bot's table, shared with its searches.
+    tree_height (int): the depth of each search, as in GameTree.
+
+    Attributes:
+    searched (dict): position key -> (GameTree, move) of each reply position searched to the end.
+    hits (int), misses (int): how many times stop() found the opponent's move pondered, or not.
+    """
+    def __init__(self, player, table, tree_height = 4):
+        self.player = player
+        self.table = table
+        self.tree_height = tree_height
+        self.searched = {}
+        self.hits = 0
+        self.misses = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._tree = None  # tree the thread is searching, None once its search has finished
+        self._lock = threading.Lock()  # makes stopping the running tree and finishing its search exclusive
+        self._pondered = False  # whether replies were pondered since the last stop()
+
+    """
+    Definition:
+    Starts pondering the replies to a move. Pondering already running is stopped first.
+
+    Parameters:
+    board (list of lists or BoardState): the position the bot moved from.
+    move (tuple): the (row, col) the bot played.
+    """
+    def start(self, board, move):
+        self.stop()
+        position = BoardState.from_board(board)
+        make_move(position, position.topology.index(move[0], move[1]), self.player)
+        if position.one_colour():
+            return  # the move won, there is nothing to reply to
+        self._pondered = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(position,), daemon=True)
+        self._thread.start()
+
+    """
+    Definition:
+    Stops pondering and waits for the thread to end; the search running is cut short at its next node.
+
+    Parameters:
+    board (list of lists or BoardState): optional, the position the opponent's move led to.
+
+    Return Value:
+    tuple: the (GameTree, move) of that position when it was searched to the end, otherwise None.
+    Without a board all the pondered work is dropped.
+    """
+    def stop(self, board = None):
+        if self._thread is not None:
+            with self._lock:
+                self._stop.set()
+                # only a search still running is stopped: a finished tree may be handed back and searched again
+                if self._tree is not None:
+                    self._tree.stop()
+            self._thread.join()
+            self._thread = None
+            self._tree = None
+        pondered, self._pondered = self._pondered, False
+        searched, self.searched = self.searched, {}
+        if board is None or not pondered:
+            return None
+
+        if not isinstance(board, BoardState):
+            board = BoardState.from_board(board)
+        found = searched.get(board.position_key(self.player))
+        if found is not None and found[0].board == board:
+            self.hits += 1
+            return found
+        self.misses += 1
+        return None
+
+    """
+    Definition:
+    Orders the opponent's replies, likeliest first: the best reply stored in the table, then the rest
+    by the opponent's evaluation of the position right after them.
+
+    Parameters:
+    position (BoardState): the position after the bot's move, left unchanged.
+
+    Return Value:
+    list: the cell indexes of the replies.
+    """
+    def predict(self, position):
+        opponent = -self.player
+        entry = self.table.search(position.position_key(opponent))
+        table_move = entry[3] if entry is not None else None
+        capacity = position.topology.capacity
+        scores = []
+        for index in range(len(position)):
+            value = position[index]
+            if value == 0 or (value * opponent > 0 and abs(value) < capacity[index]):
+                if position.topology.coords[index] == table_move:
+                    score = math.inf
+                else:
+                    undo = make_move(position, index, opponent)
+                    score = evaluate_board(position, opponent)
+                    unmake_move(position, undo)
+                scores.append((score, index))
+        scores.sort(key=lambda item: item[0], reverse=True)  # stable: equal scores stay row by row
+        return [index for _, index in scores]
+
+    def _run(self, position):
+        opponent = -self.player
+        for index in self.predict(position):
+            board = position.clone()
+            make_move(board, index, opponent)
+            if board.one_colour():
+                continue  # the opponent wins with it; there is no move left to find
+            tree = GameTree(board, self.player, self.tree_height, self.table)
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self._tree = tree
+            try:
+                move = tree.get_move()
+            except SearchTimeout:
+                return
+            with self._lock:
+                self._tree = None
+                if tree.stopped:
+                    return  # stopped just as the search finished: the tree can no longer be searched
+            self.searched[board.position_key(self.player)] = (tree, move)
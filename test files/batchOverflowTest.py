@@ -0,0 +1,82 @@
+import unittest
+import batchOverflow
+from batchOverflow import np, stack_boards, overflow_batch, batch_children
+from hadleOverflow import overflow, CascadeLimitError
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class BatchOverflowTestCase(unittest.TestCase):
+    """These are the test cases for the NumPy batch overflow"""
+
+    def test_matches_overflow(self):
+        boards = [[[2, 2, 0, 0],
+                   [0, 0, 0, 0],
+                   [0, 0, 0, -1]],
+                  [[0, 0, 0, 0],
+                   [0, 0, 0, -2],
+                   [0, 0, 2, -2]],
+                  [[1, 0, 0, 0],
+                   [0, 2, 0, 0],
+                   [0, 0, 0, -1]],
+                  # two overflowing cells of different colours in one wave
+                  [[2, 0, 0, -2],
+                   [0, 3, -1, 0],
+                   [1, 0, 0, -1]]]
+        stack = stack_boards(boards)
+        waves = overflow_batch(stack)
+
+        for i, board in enumerate(boards):
+            self.assertEqual(waves[i], overflow(board))
+            self.assertEqual(stack[i].tolist(), board)
+
+    def test_wave_budget(self):
+        stack = stack_boards([[[2, 2, 0, 0],
+                               [0, 0, 0, 0],
+                               [0, 0, 0, -1]]])
+
+        with self.assertRaises(CascadeLimitError):
+            overflow_batch(stack, max_waves=1)
+        self.assertEqual(stack[0].tolist(), [[0, 3, 0, 0],
+                                             [1, 0, 0, 0],
+                                             [0, 0, 0, -1]])
+
+    def test_repeating_cascade(self):
+        # a stand-in wave that swaps the rows of the first board forever, without losing gems
+        def swap_rows(boards, capacity):
+            boards[0] = boards[0, ::-1].copy()
+            return np.array([True] + [False] * (len(boards) - 1))
+
+        stack = stack_boards([[[2, 1, 0, 0],
+                               [0, 0, 0, 0],
+                               [0, 0, 0, -1]],
+                              [[1, 0, 0, 0],
+                               [0, 0, 0, 0],
+                               [0, 0, 0, -1]]])
+        real_wave = batchOverflow.overflow_wave
+        batchOverflow.overflow_wave = swap_rows
+        try:
+            with self.assertRaises(CascadeLimitError) as caught:
+                overflow_batch(stack)
+        finally:
+            batchOverflow.overflow_wave = real_wave
+        # found once the gem total has stayed the same for longer than the board has cells
+        self.assertGreater(caught.exception.waves, 12)
+        self.assertLess(caught.exception.waves, 60)
+
+    def test_children(self):
+        board = [[1, 2, 0, 0, 0],
+                 [0, 3, -1, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, -2, -1]]
+        children, positions = batch_children(board, 1)
+
+        self.assertEqual(len(positions), 17)
+        self.assertNotIn((1, 2), positions)
+        for child, (row, col) in zip(children, positions):
+            expected = [r.copy() for r in board]
+            expected[row][col] += 1
+            overflow(expected, start=(row, col))
+            self.assertEqual(child.tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
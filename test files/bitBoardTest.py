@@ -0,0 +1,68 @@
+import unittest
+from bitBoard import BitBoard, iter_bits
+from hadleOverflow import overflow
+
+class BitBoardTestCase(unittest.TestCase):
+    """These are the test cases for the bitboard engine"""
+
+    def test_conversion(self):
+        board = [[1, 0, 2, 0, 0],
+                 [0, 3, -1, 0, 0],
+                 [0, 0, 0, -2, 0],
+                 [0, 0, 0, -2, -1]]
+        bitboard = BitBoard.from_board(board)
+
+        self.assertEqual(bitboard.to_board(), board)
+        self.assertEqual(bitboard.get(6), 3)
+        self.assertEqual(bitboard.get(7), -1)
+        self.assertEqual(bitboard.clone().to_board(), board)
+
+    def test_legal_moves(self):
+        board = [[1, 2, 0, 0],
+                 [0, 3, -2, 0],
+                 [0, 0, 0, -1]]
+        bitboard = BitBoard.from_board(board)
+
+        # own cells below their capacity and empty cells are playable
+        self.assertEqual(list(iter_bits(bitboard.legal_moves(1))), [0, 1, 2, 3, 4, 5, 7, 8, 9, 10])
+        self.assertEqual(list(iter_bits(bitboard.legal_moves(-1))), [2, 3, 4, 6, 7, 8, 9, 10, 11])
+
+    def test_play_matches_overflow(self):
+        boards = [[[2, 2, 0, 0],
+                   [0, 0, 0, 0],
+                   [0, 0, 0, -1]],
+                  [[1, 2, 2, 2, 1, 0],
+                   [0, 3, 3, 3, 0, 0],
+                   [0, 0, 0, 0, 0, 0],
+                   [0, -1, 0, 0, 0, 0],
+                   [0, 0, 0, 0, -2, -1]]]
+        moves = [(0, 1), (1, 2)]
+
+        for board, (row, col) in zip(boards, moves):
+            bitboard = BitBoard.from_board(board)
+            waves = bitboard.play(row * len(board[0]) + col, 1)
+            board[row][col] += 1
+            self.assertEqual(waves, overflow(board))
+            self.assertGreater(waves, 0)
+            self.assertEqual(bitboard.to_board(), board)
+
+    def test_winner(self):
+        bitboard = BitBoard.from_board([[0, 0, 0, 0],
+                                        [0, 0, 0, -2],
+                                        [0, 0, 2, -1]])
+        self.assertEqual(bitboard.winner(), 0)
+        bitboard.play(11, -1)
+        self.assertEqual(bitboard.winner(), -1)
+
+    def test_cell_limit(self):
+        bitboard = BitBoard.from_board([[1, 0, 0, 0],
+                                        [0, 7, 0, 0],
+                                        [0, 0, 0, -1]])
+        # a cell holds at most 7 gems: adding an eighth raises instead of wrapping round to 0
+        with self.assertRaises(ValueError):
+            bitboard.play(5, 1)
+        self.assertEqual(bitboard.get(5), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
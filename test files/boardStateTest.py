@@ -0,0 +1,115 @@
+import unittest
+from boardState import BoardState
+from hadleOverflow import overflow, apply_wave
+from gameBoard import evaluate_board
+from dataInput import Queue
+from boardTopology import BOARD_SIZES
+import random
+
+class BoardStateTestCase(unittest.TestCase):
+    """These are the test cases for the flat BoardState"""
+
+    def test_conversion(self):
+        board = [[1, 0, 0, 0],
+                 [0, 2, -3, 0],
+                 [0, 0, 0, -1]]
+        state = BoardState.from_board(board)
+
+        self.assertEqual(state.rows, 3)
+        self.assertEqual(state.cols, 4)
+        self.assertEqual(len(state), 12)
+        self.assertEqual(state.get(1, 2), -3)
+        self.assertEqual(state[6], -3)
+        self.assertEqual(state.to_board(), board)
+        self.assertEqual(BoardState.from_bytes(3, 4, state.to_bytes()), state)
+
+    def test_clone_is_independent(self):
+        state = BoardState(3, 4)
+        state.set(0, 0, 1)
+        clone = state.clone()
+        clone.set(0, 0, 2)
+
+        self.assertEqual(state.get(0, 0), 1)
+        self.assertEqual(clone.get(0, 0), 2)
+        self.assertNotEqual(state, clone)
+
+    def test_owner_counts(self):
+        state = BoardState.from_board([[1, 0, 0, 0],
+                                       [0, 2, -3, 0],
+                                       [0, 0, 0, -1]])
+        self.assertEqual((state.p1_count, state.p2_count), (2, 2))
+        self.assertEqual(state.winner(), 0)
+
+        state.set(1, 2, 3)
+        self.assertEqual((state.p1_count, state.p2_count), (3, 1))
+        state[11] = 0
+        self.assertEqual((state.p1_count, state.p2_count), (3, 0))
+        self.assertTrue(state.one_colour())
+        self.assertEqual(state.winner(), 1)
+
+        # a capture during a cascade is counted as it happens
+        state = BoardState.from_board([[0, 0, 0, 0],
+                                       [0, 0, 0, -2],
+                                       [0, 0, 2, -2]])
+        overflow(state, start=(2, 3))
+        self.assertEqual((state.p1_count, state.p2_count), (0, 2))
+        self.assertEqual(state.winner(), -1)
+
+    def test_overflow_matches_lists(self):
+        board = [[0, 1, 0, 0, 0],
+                 [1, 4, 2, 0, 0],
+                 [0, 2, 0, -1, 0],
+                 [0, 0, 0, -2, -1]]
+        state = BoardState.from_board(board)
+        replay = BoardState.from_board(board)
+        list_queue = Queue()
+        state_queue = Queue()
+
+        steps = overflow(board, list_queue, (1, 1))
+        self.assertGreater(steps, 0)
+        self.assertEqual(overflow(state, state_queue, (1, 1)), steps)
+        self.assertEqual(state.to_board(), board)
+        while not state_queue.is_empty():
+            wave = state_queue.dequeue()
+            self.assertEqual(wave, list_queue.dequeue())
+            apply_wave(replay, wave)
+        self.assertEqual(replay, state)
+
+    def test_evaluate_matches_lists(self):
+        board = [[1, 0, 2, 0, 0, 0],
+                 [0, 2, 0, 0, 0, 0],
+                 [2, 0, 3, 0, 0, 0],
+                 [0, 0, 0, -3, 0, 0],
+                 [0, 0, 0, 0, -2, -1]]
+        state = BoardState.from_board(board)
+
+        for player in [1, -1]:
+            self.assertEqual(evaluate_board(state, player), evaluate_board(board, player))
+
+    def test_zobrist_key_follows_moves(self):
+        generator = random.Random(7)
+        for rows, cols in BOARD_SIZES:
+            state = BoardState(rows, cols)
+            state.set(0, 0, 1)
+            state.set(rows - 1, cols - 1, -1)
+            player = 1
+            for _ in range(40):
+                if state.one_colour():
+                    break
+                index = generator.choice([i for i in range(len(state))
+                                          if state[i] == 0 or (state[i] * player > 0
+                                          and abs(state[i]) < state.topology.capacity[i])])
+                state[index] += player
+                overflow(state, None, state.topology.coords[index])
+                player = -player
+
+                # the key kept through the move and its cascade is the one computed from scratch
+                fresh = BoardState(rows, cols, state.cells)
+                self.assertEqual(state.key, fresh.key)
+
+            self.assertNotEqual(state.position_key(1), state.position_key(-1))
+            self.assertEqual(BoardState(rows, cols).key, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
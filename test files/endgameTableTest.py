@@ -0,0 +1,125 @@
+import unittest
+import os
+import tempfile
+from endgameTable import EndgameTable, solve, MARKING, SOLVING
+from boardState import BoardState
+from hadleOverflow import make_move, unmake_move
+
+def can_win(board, player, plies):
+    # True when player, to move, can make only their colour be left within plies, whatever the replies
+    if plies <= 0:
+        return False
+    moves = [i for i in range(len(board)) if board[i] * player >= 0]
+    for index in moves:
+        undo = make_move(board, index, player)
+        if board.one_colour():
+            won = True
+        else:
+            won = all_lose(board, -player, plies - 1)
+        unmake_move(board, undo)
+        if won:
+            return True
+    return False
+
+def all_lose(board, player, plies):
+    # True when player, to move, loses within plies whatever they play
+    for index in range(len(board)):
+        if board[index] * player >= 0:
+            undo = make_move(board, index, player)
+            lost = not board.one_colour() and can_win(board, -player, plies - 1)
+            unmake_move(board, undo)
+            if not lost:
+                return False
+    return True
+
+class EndgameTableTestCase(unittest.TestCase):
+    """These are the test cases for the retrograde solver and its endgame table"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_results_match_a_full_search(self):
+        stats = solve(2, 3, self.path)
+        self.assertEqual(stats['reachable'], stats['wins'] + stats['losses'] + stats['draws'])
+        table = EndgameTable(self.path)
+
+        # every position a game reaches in its first plies, with the player to move
+        positions = {}
+        board = BoardState(2, 3)
+        board.set(0, 0, 1)
+        board.set(1, 2, -1)
+        level = [(board, 1)]
+        for _ in range(4):
+            following = []
+            for board, player in level:
+                positions[(board.cells.tobytes(), player)] = (board, player)
+                for index in range(len(board)):
+                    if board[index] * player >= 0:
+                        child = board.clone()
+                        make_move(child, index, player)
+                        if not child.one_colour():
+                            following.append((child, -player))
+            level = following
+
+        for board, player in positions.values():
+            result, distance = table.lookup(board, player)
+            self.assertNotEqual(result, 0)
+            if result == 1:
+                self.assertTrue(can_win(board, player, distance))
+                self.assertFalse(can_win(board, player, distance - 2))
+            else:
+                self.assertTrue(all_lose(board, player, distance))
+                self.assertFalse(all_lose(board, player, distance - 2))
+
+            # the table's move keeps the result and gets one ply closer to the end
+            (row, col) = table.best_move(board.to_board(), player)
+            child = board.clone()
+            make_move(child, row * 3 + col, player)
+            if child.one_colour():
+                self.assertEqual((result, distance), (1, 1))
+            else:
+                self.assertEqual(table.lookup(child, -player), (-result, distance - 1))
+
+        # positions the table does not cover
+        self.assertIsNone(table.lookup([[0, 0, 0], [0, 0, 0]], 1))
+        self.assertIsNone(table.lookup([[1, 0, 0, 0], [0, 0, 0, -1]], 1))
+        table.close()
+
+    def test_stopped_build_carries_on(self):
+        expected = solve(2, 4, self.path)
+        with open(self.path, 'rb') as file:
+            finished = file.read()
+        os.remove(self.path)
+
+        stops = [(MARKING, 2), (SOLVING, 3)]
+
+        def stop(stage, step, positions):
+            if stops and (stage, step) == stops[0]:
+                stops.pop(0)
+                raise KeyboardInterrupt
+
+        for _ in range(2):
+            with self.assertRaises(KeyboardInterrupt):
+                solve(2, 4, self.path, progress=stop)
+        self.assertEqual(solve(2, 4, self.path, progress=stop), expected)
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), finished)
+
+        # a finished table is not built again
+        self.assertEqual(solve(2, 4, self.path), expected)
+
+        # the work split across processes gives the same table
+        os.remove(self.path)
+        self.assertEqual(solve(2, 4, self.path, workers=2), expected)
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import unittest
+import time
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import gameBoard
+from hadleOverflow import CascadeLimitError
+from gameBoard import GameTree, SearchTimeout, evaluate_board, legal_masks
+from boardState import BoardState
+from player1 import PlayerOne
+from transpositionTable import TranspositionTable
+
+def plain_alpha_beta(board, player, tree_height):
+    # minimax with alpha-beta and full windows, moves sorted by evaluate_board: the search before PVS
+    tree = GameTree(board, player, tree_height)
+    nodes = [0]
+
+    def search(board, alpha, beta, player, depth):
+        nodes[0] += 1
+        if depth >= tree_height or tree.is_game_over(board, player):
+            return evaluate_board(board, player) * player
+        children = tree.find_adjacent_neighbors(board, player)[0]
+        children.sort(key=lambda child: evaluate_board(child, player) * player, reverse=player == 1)
+        best = -float('inf') if player == 1 else float('inf')
+        for child in children:
+            value = search(child, alpha, beta, -player, depth + 1)
+            if player == 1:
+                best = max(best, value)
+                alpha = max(alpha, best)
+            else:
+                best = min(best, value)
+                beta = min(beta, best)
+            if beta <= alpha:
+                break
+        return best
+
+    children, winning_row, winning_col, moves = tree.find_adjacent_neighbors(board, player)
+    if winning_row is not None:
+        return (winning_row, winning_col), nodes[0]
+    best_move, best = None, -float('inf') if player == 1 else float('inf')
+    for child, move in zip(children, moves):
+        value = search(child, -float('inf'), float('inf'), -player, 1)
+        if (player == 1 and value > best) or (player == -1 and value < best):
+            best_move, best = move, value
+    return best_move, nodes[0]
+
+class GameTreeTestCase(unittest.TestCase):
+    """These are the test cases for the search of GameTree"""
+
+    def test_lazy_expansion(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0],
+                 [0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, -1]]
+        tree = GameTree(board, 1, 3)
+
+        # nothing is built before the search runs
+        self.assertIsNone(tree.root.children)
+
+        move = tree.get_move()
+        children = tree.root.children
+        self.assertIn(move, [child.move for child in children])
+        self.assertTrue(all(child.depth == 1 and child.player == -1 for child in children))
+
+        # nodes at the tree height are evaluated, never expanded
+        stack = list(children)
+        while stack:
+            node = stack.pop()
+            if node.depth >= tree.tree_height:
+                self.assertIsNone(node.children)
+            elif node.children:
+                stack.extend(node.children)
+
+    def test_endless_cascade_skipped(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0],
+                 [0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, -1]]
+        # a stand-in make_move whose cascade never settles when the corner at (0, 0) overflows
+        real_make_move = gameBoard.make_move
+        def make_move(board, index, player, max_waves=None):
+            if index == 0:
+                raise CascadeLimitError('overflow cascade repeats itself after 2 waves', 2)
+            return real_make_move(board, index, player, max_waves)
+
+        gameBoard.make_move = make_move
+        try:
+            tree = GameTree(board, 1, 3)
+            move = tree.get_move()
+        finally:
+            gameBoard.make_move = real_make_move
+
+        # the move is left out of the tree and the search goes on from the other moves
+        moves = [child.move for child in tree.root.children]
+        self.assertNotIn((0, 0), moves)
+        self.assertIn(move, moves)
+        self.assertEqual(tree.board, BoardState.from_board(board))
+
+    def test_winning_move_found_at_root(self):
+        board = [[0, 0, 0, 0],
+                 [0, 0, 0, -1],
+                 [0, 0, 1, 1]]
+        tree = GameTree(board, 1)
+        self.assertEqual(tree.get_move(), (2, 3))
+        self.assertEqual(tree.root.winning_move, (2, 3))
+
+    def test_time_budget(self):
+        board = [[1, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, -1]]
+        tree = GameTree(board, -1)
+        start = time.perf_counter()
+        move = tree.get_move(150)
+        elapsed = time.perf_counter() - start
+
+        self.assertIn(move, [child.move for child in tree.root.children])
+        self.assertGreaterEqual(tree.completed_depth, 1)
+        # only a loose bound on the clock: the budget plus the first depth, which always runs to the end
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(tree.tree_height, 4)
+
+        # a small board gets searched deeper in the same time
+        tree = GameTree([[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]], -1)
+        self.assertIsNotNone(tree.get_move(150))
+        self.assertGreaterEqual(tree.completed_depth, 2)
+
+    def test_time_budget_with_warm_table(self):
+        # results stored by an earlier search do not end the deepening early: they still stopped at a depth limit
+        positions = [([[1, 0, 1, 0, -1],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 0, 0, 0, -1]], 1),
+                     ([[1, -1, 0, 0, 0],
+                       [0, 2, 1, 0, 0],
+                       [0, 0, 0, -1, 0],
+                       [0, 0, 0, 0, -1]], -1),
+                     ([[1, 0, 0, 0, 0],
+                       [0, 0, 0, 0, 0],
+                       [0, 1, 0, 0, -1],
+                       [0, 1, 0, -2, 0]], 1)]
+        for board, player in positions:
+            table = TranspositionTable()
+            first = GameTree(board, player, table=table)
+            first.get_move(400)
+            second = GameTree(board, player, table=table)
+            self.assertIn(second.get_move(400), [child.move for child in second.root.children])
+            self.assertGreaterEqual(second.completed_depth, first.completed_depth)
+
+    def test_parallel_root_search(self):
+        boards = [[[1, 0, 0, 0, 0],
+                   [0, 2, 0, 0, 0],
+                   [0, 0, 0, -2, 0],
+                   [0, 0, 0, 0, -1]],
+                  [[1, 0, 2, 0],
+                   [0, -1, 0, 0],
+                   [0, 0, -2, -1]]]
+        with ProcessPoolExecutor(2) as executor:
+            for board in boards:
+                for player in [1, -1]:
+                    tree = GameTree(board, player, 3, executor=executor, workers=2)
+                    self.assertEqual(tree.get_move(), GameTree(board, player, 3).get_move())
+                    self.assertGreater(tree.nodes, 0)
+
+            # stop() from another thread ends a parallel search without waiting for the workers
+            board = [[1, 0, 0, 0, 0, 0],
+                     [0, 2, 0, 0, 0, 0],
+                     [0, 0, 0, 0, 0, 0],
+                     [0, 0, 0, 0, -2, 0],
+                     [0, 0, 0, 0, 0, -1]]
+            tree = GameTree(board, 1, 5, executor=executor, workers=2)  # about 2 s to search in full
+            threading.Timer(0.2, tree.stop).start()
+            start = time.perf_counter()
+            with self.assertRaises(SearchTimeout):
+                tree.get_move()
+            self.assertLess(time.perf_counter() - start, 1.0)
+            self.assertEqual(tree.board, BoardState.from_board(board))
+
+    def test_advance_reuses_subtree(self):
+        board = [[1, 0, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+        bot = PlayerOne(use_book=False, use_table=False)
+        move = bot.get_play(board)
+        tree = bot.tree
+
+        # play the bot's move and one of the replies the search looked at
+        child = [child for child in tree.root.children if child.move == move][0]
+        reply = child.children[0]
+        tree.play_node(child)
+        tree.play_node(reply)
+        position = tree.board.to_board()
+        tree.undo_node(reply)
+        tree.undo_node(child)
+        self.assertEqual(tree.board.to_board(), board)
+
+        self.assertTrue(tree.advance(position))
+        self.assertIs(tree.root, reply)
+        self.assertEqual(tree.board.to_board(), position)
+        self.assertFalse(tree.advance(board))
+
+        # the bot continues from that node and plays what a new search would
+        self.assertEqual(bot.get_play(position), GameTree(position, 1).get_move())
+        self.assertIs(bot.tree, tree)
+
+    def test_move_ordering(self):
+        board = [[1, 0, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+        tree = GameTree(board, 1)
+        children = tree.expand(tree.root)
+        moves = [child.move for child in children]
+
+        # without any knowledge the row-by-row order is kept
+        self.assertEqual([child.move for child in tree.order_moves(children, 1, 0, None)], moves)
+
+        tree.record_cutoff((1, 1), 1, 0, 3)
+        tree.record_cutoff((2, 2), 1, 0, 1)
+        tree.record_cutoff((0, 3), 1, 2, 2)
+        ordered = [child.move for child in tree.order_moves(children, 1, 0, (1, 0))]
+        self.assertEqual(ordered[:4], [(1, 0), (2, 2), (1, 1), (0, 3)])
+        self.assertEqual(tree.history[((1, 1), 1)], 9)
+        self.assertEqual(sorted(ordered), sorted(moves))
+
+    def test_pvs_matches_plain_search(self):
+        boards = [[[0, 2, -1, 0, 0, 0],
+                   [2, 0, 0, 0, 0, 0],
+                   [1, 0, 0, 0, 0, 0],
+                   [0, 0, 0, 0, 2, 0],
+                   [0, 0, 0, 2, 0, -1]],
+                  [[1, 0, 2, 0, 0, 0],
+                   [0, 2, 0, 0, 0, 0],
+                   [2, 0, 3, 0, 0, 0],
+                   [0, 0, 0, -3, 0, 0],
+                   [0, 0, 0, 0, -2, -1]],
+                  [[1, 0, 0, 0],
+                   [0, 2, -1, 0],
+                   [0, 0, 0, -1]]]
+        for board in boards:
+            for player in [1, -1]:
+                move, plain_nodes = plain_alpha_beta(board, player, 3)
+                tree = GameTree(board, player, 3)
+                self.assertEqual(tree.get_move(), move)
+                self.assertLess(tree.nodes, plain_nodes)
+
+        # min_max_evaluation still gives values with player 1 maximizing
+        tree = GameTree(boards[2], 1, 1)
+        child = tree.expand(tree.root)[0]
+        tree.play_node(child)
+        self.assertEqual(tree.min_max_evaluation(child, -float('inf'), float('inf'), -1, 1),
+                         -evaluate_board(tree.board, -1))
+
+    def test_incremental_evaluation(self):
+        # a random walk down the tree and back up: the kept score and legal cells are always the ones read from the board
+        rng = random.Random(4)
+        tree = GameTree([[1, 2, 3, 0, 0],
+                         [2, 3, 2, -2, 0],
+                         [2, 3, -3, -2, 0],
+                         [0, 0, -2, -3, -1]], 1)  # full cells: long cascades that rewrite the whole board too
+        for _ in range(20):
+            path = []
+            node = tree.root
+            while len(path) < 8 and not tree.is_game_over(tree.board, -node.player):
+                children = tree.expand(node)
+                # the legal cells worked out from the parent's are the ones a full scan finds
+                self.assertEqual(node.legal, legal_masks(tree.board))
+                node = rng.choice(children)
+                tree.play_node(node)
+                path.append(node)
+                for player in [1, -1]:
+                    self.assertEqual(tree.evaluation.score(player), evaluate_board(tree.board, player))
+            for node in reversed(path):
+                tree.undo_node(node)
+            self.assertEqual(tree.evaluation.score(1), evaluate_board(tree.board, 1))
+        self.assertEqual(tree.evaluation.saved, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import time
+from monteCarlo import MonteCarloTree
+from playerMonteCarlo import PlayerMonteCarlo
+from bitBoard import BitBoard
+
+class MonteCarloTestCase(unittest.TestCase):
+    """These are the test cases for the Monte Carlo tree search bot"""
+
+    def test_playouts_are_counted(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0],
+                 [0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, -1]]
+        tree = MonteCarloTree(board, -1, 300, seed=3)
+        (row, col) = tree.get_move()
+
+        self.assertLessEqual(board[row][col], 0)
+        self.assertEqual(tree.runs, 300)
+        self.assertEqual(tree.root.visits, 300)
+        self.assertEqual(sum(child.visits for child in tree.root.children), 300)
+        # the move played is the most visited one
+        best = max(tree.root.children, key=lambda child: child.visits)
+        self.assertEqual(divmod(best.move, 5), (row, col))
+
+        # the same seed gives the same game
+        self.assertEqual(MonteCarloTree(board, -1, 300, seed=3).get_move(), (row, col))
+
+    def test_winning_move_found_at_root(self):
+        board = [[0, 0, 0, 0],
+                 [0, 0, 0, -1],
+                 [0, 0, 1, 1]]
+        tree = MonteCarloTree(board, 1)
+        self.assertEqual(tree.get_move(), (2, 3))
+        self.assertEqual(tree.runs, 0)
+
+        # nothing to play once the game is over
+        self.assertIsNone(MonteCarloTree([[1, 0, 0], [0, 0, 2]], -1).get_move())
+
+    def test_time_budget(self):
+        board = [[1, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, -1]]
+        bot = PlayerMonteCarlo(-1, time_budget=150)
+        start = time.perf_counter()
+        (row, col) = bot.get_play(board)
+        elapsed = time.perf_counter() - start
+
+        self.assertLessEqual(board[row][col], 0)
+        self.assertGreater(bot.tree.runs, 0)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(bot.get_name(), "P2 MCTS")
+
+    def test_rollout_ends_the_game(self):
+        tree = MonteCarloTree([[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]], 1, seed=5)
+        position = BitBoard.from_board([[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]])
+        for _ in range(20):
+            self.assertIn(tree.rollout(position, 1), [1, -1])
+        # the position itself is left untouched
+        self.assertEqual(position.to_board(), [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import time
+from moveWorker import MoveWorker
+from player1 import PlayerOne
+from player2 import PlayerTwo
+from playerMonteCarlo import PlayerMonteCarlo
+from gameBoard import GameTree
+
+class MoveWorkerTestCase(unittest.TestCase):
+    """These are the test cases for searching a bot's move in the background"""
+
+    def test_move_matches_the_bot(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0],
+                 [0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, -1]]
+        bot = PlayerTwo(use_book=False, use_table=False)
+        worker = MoveWorker(bot, board)
+        while not worker.done():
+            time.sleep(0.01)  # the game loop draws a frame here
+        self.assertEqual(worker.result(), GameTree(board, -1).get_move())
+        self.assertTrue(worker.progress().startswith("depth 4, "))
+        self.assertFalse(worker.cancelled)
+
+    def test_cancel_stops_the_search(self):
+        board = [[1, 0, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, 0, -1]]
+        bot = PlayerOne(time_budget=60000, use_book=False, use_table=False)
+        bot.tree = GameTree(board, 1)  # a tree from an earlier move, stopped too
+        worker = MoveWorker(bot, board)
+        time.sleep(0.05)
+        self.assertFalse(worker.done())
+
+        start = time.perf_counter()
+        worker.cancel()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertTrue(worker.done())
+        self.assertIsNone(bot.tree)
+
+        # the bot's next move is searched from scratch
+        bot.time_budget = None
+        self.assertEqual(bot.get_play([[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]]),
+                         GameTree([[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]], 1).get_move())
+
+    def test_cancel_monte_carlo(self):
+        board = [[1, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, -1]]
+        bot = PlayerMonteCarlo(1, playouts=10 ** 6)
+        worker = MoveWorker(bot, board)
+        time.sleep(0.05)
+        self.assertRegex(worker.progress(), r"^\d+ playouts$")
+
+        start = time.perf_counter()
+        worker.cancel()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertIsNone(bot.tree)
+
+
+if __name__ == '__main__':
+    unittest.main()
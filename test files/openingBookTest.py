@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+from openingBook import OpeningBook, build_section, write_book, start_position
+from gameBoard import GameTree
+from hadleOverflow import make_move
+
+class OpeningBookTestCase(unittest.TestCase):
+    """These are the test cases for the opening book"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_book_gives_searched_moves(self):
+        moves = build_section(3, 4, 2, 3)
+        write_book(self.path, {(3, 4): (2, 3, moves)})
+        book = OpeningBook(self.path)
+        self.assertEqual(book.sections[(3, 4)][:2], (2, 3))
+        # the start position and every reply of player 1 to it
+        self.assertEqual(len(book), 1 + 11)
+
+        start = start_position(3, 4)
+        move = book.lookup(start.to_board(), 1)
+        self.assertEqual(move, GameTree(start, 1, 3).get_move())
+        self.assertEqual(book.lookup(start, 1), move)
+
+        # the replies share one table, so a reply can come from a deeper result than a new search
+        for index in [0, 5, 10]:
+            board = start.clone()
+            make_move(board, index, 1)
+            (row, col) = book.lookup(board, -1)
+            self.assertLessEqual(board.get(row, col), 0)
+
+        # positions outside the book, or on other board sizes, fall back to the search
+        self.assertIsNone(book.lookup(start, -1))
+        self.assertIsNone(book.lookup(start_position(4, 5), 1))
+        book.close()
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'not a book at all')
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+from hadleOverflow import overflow, apply_wave, CascadeLimitError, make_move, unmake_move
+from dataInput import Queue
+from boardState import BoardState
+
+class OverflowTestCase(unittest.TestCase):
+    """These are the test cases for the overflow cascade"""
+
+    def test_no_overflow(self):
+        board = [[1, 0, 0, 0],
+                 [0, 2, 0, 0],
+                 [0, 0, 0, -1]]
+        queue = Queue()
+
+        self.assertEqual(overflow(board, queue, (1, 1)), 0)
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(board, [[1, 0, 0, 0],
+                                 [0, 2, 0, 0],
+                                 [0, 0, 0, -1]])
+
+    def test_corner_chain(self):
+        # playing the top left corner overflows it, which then overflows the edge next to it
+        board = [[2, 2, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+        queue = Queue()
+
+        replay = [row.copy() for row in board]
+
+        self.assertEqual(overflow(board, queue, (0, 0)), 2)
+        self.assertEqual(len(queue), 2)
+        # each wave only holds the (cell index, new value) pairs it changed
+        first_wave = queue.dequeue()
+        self.assertEqual(first_wave, [(0, 0), (1, 3), (4, 1)])
+        apply_wave(replay, first_wave)
+        self.assertEqual(replay, [[0, 3, 0, 0],
+                                  [1, 0, 0, 0],
+                                  [0, 0, 0, -1]])
+        apply_wave(replay, queue.dequeue())
+        self.assertEqual(replay, [[1, 0, 1, 0],
+                                  [1, 1, 0, 0],
+                                  [0, 0, 0, -1]])
+        self.assertEqual(board, replay)
+
+    def test_without_history(self):
+        board = [[2, 2, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+
+        self.assertEqual(overflow(board, start=(0, 0)), 2)
+        self.assertEqual(board, [[1, 0, 1, 0],
+                                 [1, 1, 0, 0],
+                                 [0, 0, 0, -1]])
+
+    def test_wave_budget(self):
+        board = [[2, 2, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+        queue = Queue()
+
+        with self.assertRaises(CascadeLimitError) as caught:
+            overflow(board, queue, (0, 0), max_waves=1)
+        self.assertEqual(caught.exception.waves, 1)
+        self.assertEqual(len(queue), 1)
+        # the grid keeps the waves that were applied before the cascade was stopped
+        self.assertEqual(board, [[0, 3, 0, 0],
+                                 [1, 0, 0, 0],
+                                 [0, 0, 0, -1]])
+
+        board = [[2, 2, 0, 0],
+                 [0, 0, 0, 0],
+                 [0, 0, 0, -1]]
+        self.assertEqual(overflow(board, Queue(), (0, 0), max_waves=2), 2)
+
+    def test_long_chain(self):
+        # a chain along a wide board is far longer than the old recursion could handle
+        cols = 1200
+        board = [[2] * cols, [0] * cols]
+        board[0][cols - 1] = 1
+        board[1][cols - 1] = -1
+
+        # every cell of the top row overflows in turn, then the last one captures the -1
+        self.assertEqual(overflow(board, Queue(), (0, 0)), cols)
+        self.assertEqual(board[0][cols - 1], 0)
+        self.assertEqual(board[1][cols - 1], 2)
+
+    def test_capture_stops_cascade(self):
+        # once only one colour is left the remaining full cells stay as they are
+        board = [[0, 0, 0, 0],
+                 [0, 0, 0, -2],
+                 [0, 0, 2, -2]]
+        queue = Queue()
+
+        self.assertEqual(overflow(board, queue, (2, 3)), 1)
+        self.assertEqual(board, [[0, 0, 0, 0],
+                                 [0, 0, 0, -3],
+                                 [0, 0, -3, 0]])
+
+    def test_same_result_with_and_without_start(self):
+        boards = [
+            [[0, 1, 0, 0, 0],
+             [1, 3, 2, 0, 0],
+             [0, 2, 0, -1, 0],
+             [0, 0, 0, -2, -1]],
+            [[1, 2, 2, 2, 1, 0],
+             [0, 3, 3, 3, 0, 0],
+             [0, 0, 0, 0, 0, 0],
+             [0, -1, 0, 0, 0, 0],
+             [0, 0, 0, 0, -2, -1]],
+        ]
+        moves = [(1, 1), (0, 2)]
+
+        for board, (row, col) in zip(boards, moves):
+            board[row][col] += 1
+            scanned = [r.copy() for r in board]
+            scanned_queue = Queue()
+            started_queue = Queue()
+
+            steps = overflow(scanned, scanned_queue)
+            self.assertGreater(steps, 0)
+            self.assertEqual(overflow(board, started_queue, (row, col)), steps)
+            self.assertEqual(board, scanned)
+            while not scanned_queue.is_empty():
+                self.assertEqual(started_queue.dequeue(), scanned_queue.dequeue())
+            self.assertTrue(started_queue.is_empty())
+
+    def test_make_and_unmake_move(self):
+        boards = [[[1, 1, 0, 0],
+                   [0, 0, 0, 0],
+                   [0, 0, 0, -1]],
+                  [[1, 2, 2, 2, 1],
+                   [1, 3, 3, 3, 0],
+                   [0, 0, 0, 0, 0],
+                   [0, 0, 0, -2, -1]]]
+        moves = [(0, 0), (1, 1)]
+
+        # a short cascade is taken back from its log, a long one from a copy of the cells
+        for board, (row, col) in zip(boards, moves):
+            state = BoardState.from_board(board)
+            before = state.clone()
+
+            undo = make_move(state, state.topology.index(row, col), 1)
+            board[row][col] += 1
+            overflow(board, None, (row, col))
+            self.assertEqual(state.to_board(), board)
+            self.assertEqual(state, BoardState.from_board(board))
+            self.assertEqual(state.key, BoardState.from_board(board).key)
+
+            unmake_move(state, undo)
+            self.assertEqual(state, before)
+            self.assertEqual((state.p1_count, state.p2_count, state.key),
+                             (before.p1_count, before.p2_count, before.key))
+
+    def test_make_move_over_wave_budget(self):
+        state = BoardState.from_board([[2, 2, 0, 0],
+                                       [0, 0, 0, 0],
+                                       [0, 0, 0, -1]])
+        before = state.clone()
+
+        # a cascade stopped by its wave budget is taken back before the error is passed on
+        with self.assertRaises(CascadeLimitError):
+            make_move(state, 0, 1, max_waves=1)
+        self.assertEqual(state, before)
+        self.assertEqual((state.p1_count, state.p2_count, state.key),
+                         (before.p1_count, before.p2_count, before.key))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import time
+from pondering import Ponderer
+from player1 import PlayerOne
+from gameBoard import GameTree
+from boardState import BoardState
+from hadleOverflow import make_move
+
+class PonderingTestCase(unittest.TestCase):
+    """These are the test cases for searching during the opponent's turn"""
+
+    def test_pondered_reply_is_answered_at_once(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, -1]]
+        bot = PlayerOne(use_book=False, use_table=False, ponder=True)
+        move = bot.get_play(board)
+        bot.ponderer._thread.join()  # the opponent took long enough for every reply to be searched
+
+        # the opponent replies: the move is the one a search from scratch finds
+        position = BoardState.from_board(board)
+        make_move(position, move[0] * 5 + move[1], 1)
+        make_move(position, 3 * 5 + 3, -1)
+        pondered = bot.ponderer.stop(position)
+        self.assertIsNotNone(pondered)
+        start = time.perf_counter()
+        reply = bot.choose_move(position, pondered)  # only the answer is timed, not starting the next pondering thread
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual((bot.ponderer.hits, bot.ponderer.misses), (1, 0))
+        self.assertEqual(reply, GameTree(position, 1).get_move())
+        self.assertEqual(bot.tree.board, position)
+
+    def test_hit_then_miss(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, -1]]
+        for time_budget in [None, 200]:
+            bot = PlayerOne(time_budget=time_budget, use_book=False, use_table=False, ponder=True)
+            move = bot.get_play(board)
+            position = BoardState.from_board(board)
+            make_move(position, move[0] * 5 + move[1], 1)
+            last = bot.ponderer.predict(position)[-1]
+            bot.ponderer._thread.join()  # every reply searched, the last one by the tree the thread searched last
+
+            # the reply searched last is a hit, and pondering starts again
+            make_move(position, last, -1)
+            move = bot.get_play(position)
+            self.assertEqual((bot.ponderer.hits, bot.ponderer.misses), (1, 0))
+            if time_budget is None:
+                self.assertEqual(move, GameTree(position, 1).get_move())
+
+            # the opponent replies at once, before pondering got to that reply (one late in the order, which leaves
+            # no winning move, so there is a search): a miss, searched from the tree of the hit
+            make_move(position, move[0] * 5 + move[1], 1)
+            make_move(position, bot.ponderer.predict(position)[-2], -1)
+            move = bot.get_play(position)
+            self.assertEqual((bot.ponderer.hits, bot.ponderer.misses), (1, 1))
+            self.assertGreaterEqual(position.get(*move), 0)
+            bot.stop_pondering()
+
+    def test_stop_drops_the_work(self):
+        board = [[1, 0, 0, 0, 0, 0],
+                 [0, 2, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, -2, 0],
+                 [0, 0, 0, 0, 0, -1]]
+        bot = PlayerOne(use_book=False, use_table=False)
+        ponderer = Ponderer(1, bot.table, 5)
+        ponderer.start(board, (0, 0))
+
+        # stopping in the middle of a deep search returns at once
+        time.sleep(0.05)
+        start = time.perf_counter()
+        self.assertIsNone(ponderer.stop([[2, 0, 0, 0, 0, 0],
+                                         [0, 2, 0, 0, 0, 0],
+                                         [0, 0, 0, 0, 0, 0],
+                                         [0, 0, 0, 0, -2, 0],
+                                         [0, 0, 0, 0, 0, -1]]))
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(ponderer.misses, 1)
+        self.assertEqual(ponderer.searched, {})
+
+        # the bot still plays what it would have without pondering
+        self.assertEqual(bot.get_play(board), GameTree(board, 1).get_move())
+
+    def test_replies_ordered_by_the_table(self):
+        position = BoardState.from_board([[1, 0, 0, 0],
+                                          [0, 0, 0, 0],
+                                          [0, 0, 0, -1]])
+        bot = PlayerOne(use_book=False, use_table=False)
+        ponderer = Ponderer(1, bot.table)
+        replies = ponderer.predict(position)
+        self.assertEqual(sorted(replies), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
+
+        bot.table.store(position.position_key(-1), 3, 0.0, 0, (1, 2))
+        self.assertEqual(ponderer.predict(position)[0], 6)
+        self.assertEqual(position.to_board(), [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, -1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
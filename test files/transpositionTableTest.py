@@ -0,0 +1,63 @@
+import unittest
+from hashTable import BoundedHashTable
+from transpositionTable import TranspositionTable, EXACT, LOWER
+from gameBoard import GameTree
+
+class TranspositionTableTestCase(unittest.TestCase):
+    """These are the test cases for the bounded hash table and the transposition table"""
+
+    def test_bounded_table_stays_capped(self):
+        table = BoundedHashTable(8, 2)
+        for i in range(100):
+            table.insert(i, i * i)
+
+        self.assertEqual(table.capacity(), 8)
+        self.assertLessEqual(len(table), 16)
+        self.assertEqual(table.evictions, 100 - len(table))
+        # the newest keys are kept, the oldest ones were evicted
+        self.assertEqual(table.search(99), 99 * 99)
+        self.assertIsNone(table.search(0))
+        self.assertFalse(table.insert(99, 0))
+
+    def test_deeper_entries_are_kept(self):
+        table = TranspositionTable(1, 2)
+        table.store('deep', 5, 1.0, EXACT, (0, 0))
+        table.store('shallow', 1, 2.0, EXACT, (0, 1))
+        table.store('new', 2, 3.0, LOWER, None)
+
+        self.assertIsNotNone(table.search('deep'))
+        self.assertIsNone(table.search('shallow'))
+        self.assertEqual(table.search('new'), (2, 3.0, LOWER, None, True))
+
+        # a shallower result does not replace a deeper one for the same key
+        table.store('deep', 3, 9.0, EXACT, None)
+        self.assertEqual(table.search('deep'), (5, 1.0, EXACT, (0, 0), True))
+
+    def test_hit_and_miss_counters(self):
+        table = TranspositionTable()
+        self.assertIsNone(table.probe('a'))
+        table.store('a', 1, 0.5, EXACT, None)
+        self.assertIsNotNone(table.probe('a'))
+        self.assertEqual((table.hits, table.misses), (1, 1))
+        self.assertEqual(table.hit_rate(), 0.5)
+
+    def test_shared_table_gives_same_move(self):
+        board = [[1, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, -1]]
+        table = TranspositionTable()
+        first = GameTree(board, 1, 4, table)
+        move = first.get_move()
+        self.assertGreater(table.hits, 0)
+
+        # a second search of the same position reuses the stored results
+        misses = table.misses
+        second = GameTree(board, 1, 4, table)
+        self.assertEqual(second.get_move(), move)
+        self.assertEqual(table.misses, misses)
+        self.assertEqual(GameTree(board, 1, 4).get_move(), move)
+
+
+if __name__ == '__main__':
+    unittest.main()
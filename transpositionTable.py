@@ -0,0 +1,85 @@
+from hashTable import BoundedHashTable
+
+# Bound types of a stored value
+EXACT = 0  # the value is the exact value of the position
+LOWER = 1  # the search failed high: the real value is at least this
+UPPER = 2  # the search failed low: the real value is at most this
+
+class TranspositionTable(BoundedHashTable):
+    """
+    Definition:
+    Remembers the results of GameTree.min_max_evaluation, so a position reached again by another
+    order of moves is not searched twice. Keys are a position plus the side to move; each value is
+    a (depth, value, bound, best_move, limited) tuple, depth being how many plies were searched below it
+    and limited whether that search stopped anywhere at its depth limit (False when every line below
+    the position was searched to the end of the game).
+    Memory is capped by the bounded table. When a bucket is full the entry searched to the smallest
+    depth is replaced, since a deep result costs the most to compute again.
+    hits and misses count the lookups made with probe.
+
+    Parameters:
+    capacity (default value is 32768): The number of buckets.
+    bucket_size (default value is 4): The maximum number of entries per bucket.
+    """
+    def __init__(self, capacity=1 << 15, bucket_size=4):
+        super().__init__(capacity, bucket_size)
+        self.hits = 0
+        self.misses = 0
+
+    """
+    Definition: 
+    Looks up the entry stored for a key.
+
+    Parameters:
+    key: The position key (position and side to move).
+
+    Return: 
+    The (depth, value, bound, best_move, limited) tuple, or None if the position is not stored.
+    """
+    def probe(self, key):
+        entry = self.search(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    """
+    Definition: 
+    Stores the result of a search. An entry already stored for the key is only replaced
+    by a result searched at least as deep.
+
+    Parameters:
+    key: The position key (position and side to move).
+    depth (int): The number of plies searched below the position.
+    value (float): The value found by the search.
+    bound (int): EXACT, LOWER or UPPER.
+    best_move (tuple): The (row, col) of the best move found, or None.
+    limited (bool): Whether the search stopped anywhere at its depth limit; True when not known.
+    """
+    def store(self, key, depth, value, bound, best_move, limited=True):
+        entry = (depth, value, bound, best_move, limited)
+        bucket = self.table[hash(key) % self._capacity]
+        if bucket is not None:
+            for i in range(len(bucket)):
+                if bucket[i][0] == key:
+                    if depth >= bucket[i][1][0]:
+                        bucket[i] = (key, entry) # Update existing entry
+                    return
+        self.insert(key, entry)
+
+    def _evict(self, bucket):
+        # Replace the shallowest entry; the oldest one among equals.
+        shallowest = 0
+        for i in range(1, len(bucket)):
+            if bucket[i][1][0] < bucket[shallowest][1][0]:
+                shallowest = i
+        return shallowest
+
+    """
+    Definition: 
+    Returns the share of probes that found an entry, between 0 and 1.
+    """
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0